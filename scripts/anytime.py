@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+from instrument import traced
+
+
+def time_grid(time_limit, points=21, spacing='linear', first=None):
+    """Shared time grid for anytime curves, ending at the experiment's time limit.
+
+    spacing='linear' starts at 0; spacing='log' starts at first (default
+    time_limit / 1000) and spaces the points geometrically.
+    """
+    if spacing == 'linear':
+        return np.linspace(0.0, time_limit, points)
+    if spacing == 'log':
+        first = first or time_limit / 1000.0
+        return np.geomspace(first, time_limit, points)
+    raise ValueError(f"spacing must be 'linear' or 'log', not {spacing!r}")
+
+
+def experiment_grids(experiments_df, points=21, spacing='linear'):
+    """time_grid of every experiment up to its own time limit, keyed by experiment id."""
+    limits = experiments_df.groupby('id', sort=False)['timelimit'].max()
+    return {experimentid: time_grid(limit, points, spacing) for experimentid, limit in limits.items()}
+
+
+def experiment_label(experiment, sampler_id=None):
+    """Title of one experiment's panel: its name, and its sampler if it has one."""
+    if sampler_id is None or pd.isna(sampler_id):
+        return str(experiment)
+    return f'{experiment} (sampler {sampler_id})'
+
+
+@traced()
+def resample_runs(progress_df, grid, value='best_cost'):
+    """Carry every run's step function forward onto the grid, for all runs at once.
+
+    Returns (runids, names, matrix) where matrix[r, g] is the last value
+    run r reported at or before grid[g], or NaN if it had none yet (no
+    solution found). One searchsorted call covers all runs.
+    """
+    df = progress_df.sort_values(['runid', 'time'], kind='stable')
+    run_codes, runids = pd.factorize(df['runid'], sort=True)
+    names = df.drop_duplicates('runid').set_index('runid').loc[runids, 'name'].to_numpy()
+
+    solved = df[value].notna().to_numpy()
+    codes = run_codes[solved]
+    times = df['time'].to_numpy(dtype='float64')[solved]
+    values = df[value].to_numpy(dtype='float64')[solved]
+
+    # Offset each run's times into its own disjoint range of one sorted key
+    grid = np.asarray(grid, dtype='float64')
+    span = max(grid[-1], times.max() if len(times) else 0.0) + 1.0
+    keys = codes * span + times
+    queries = np.arange(len(runids))[:, np.newaxis] * span + grid[np.newaxis, :]
+
+    idx = np.searchsorted(keys, queries, side='right') - 1
+    valid = idx >= 0
+    valid[valid] = codes[idx[valid]] == np.nonzero(valid)[0]
+    matrix = np.full(queries.shape, np.nan)
+    matrix[valid] = values[idx[valid]]
+    return np.asarray(runids), names, matrix
+
+
+@traced()
+def anytime_bands(progress_df, grid, value='best_cost', percentiles=(25, 75)):
+    """Median and percentile bands of the resampled curves per (experiment, planner).
+
+    Experiments are never pooled, not even ones sharing a name under
+    different samplers: grid is either one grid for all of them or a dict of
+    grids keyed by experiment id (see experiment_grids). Runs without a
+    solution yet count as infinitely expensive, so a band is NaN until
+    enough runs have solved. Returns one row per (experiment, planner, time)
+    with median, p<percentile> columns and solved_fraction, labelled with the
+    experiment and sampler_id columns of progress_df when it has them.
+    """
+    if 'experimentid' in progress_df.columns:
+        experiments = progress_df.groupby('experimentid', sort=False, dropna=False)
+    else:
+        experiments = [(None, progress_df)]
+    labels = [column for column in ('experiment', 'sampler_id') if column in progress_df.columns]
+
+    frames = []
+    for experimentid, group in experiments:
+        experiment_grid = grid[experimentid] if isinstance(grid, dict) else grid
+        _, names, matrix = resample_runs(group, experiment_grid, value)
+        matrix = np.where(np.isnan(matrix), np.inf, matrix)
+        for name in pd.unique(names):
+            runs = matrix[names == name]
+            # Interpolating between two unsolved runs (inf - inf) gives NaN
+            # with a warning; it is cleared below like any other non-finite band
+            with np.errstate(invalid='ignore'):
+                qs = np.quantile(runs, [0.5] + [p / 100 for p in percentiles], axis=0)
+            qs[~np.isfinite(qs)] = np.nan
+            frame = pd.DataFrame({'name': name, 'time': experiment_grid, 'median': qs[0]})
+            for position, column in enumerate(labels):
+                frame.insert(position, column, group[column].iloc[0])
+            for p, band in zip(percentiles, qs[1:]):
+                frame[f'p{p}'] = band
+            frame['solved_fraction'] = np.isfinite(runs).mean(axis=0)
+            frame['runs'] = len(runs)
+            frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
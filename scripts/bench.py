@@ -0,0 +1,245 @@
+"""Command-line entry point for the benchmark analyses.
+
+    python bench.py inspect mydatabase_uniform.db
+    python bench.py summary mydatabase_uniform.db mydatabase_gaussian.db
+    python bench.py convergence mydatabase_gaussian.db --log
+    python bench.py compare mydatabase_uniform.db --metric time best_cost
+    python bench.py boxplots mydatabase_uniform.db
+    python bench.py ingest logfile.log -d mydatabase.db
+
+Only the standard library is imported up front; each subcommand imports
+pandas, matplotlib and friends itself, so `inspect` and `--help` start
+immediately. Nothing is ever installed at run time: missing packages are
+reported with the command to install them.
+
+--trace records time, CPU time, peak memory and row counts of each stage
+(see instrument.py); BENCH_TRACE=1 does the same for any other script.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import urllib.parse
+
+
+def _require(*modules):
+    # Fail with an actionable message instead of installing anything
+    import importlib.util
+    missing = [module for module in modules if importlib.util.find_spec(module) is None]
+    if missing:
+        sys.exit(f'Missing packages: {" ".join(missing)}. Install them with: '
+                 f'{sys.executable} -m pip install {" ".join(missing)}')
+
+
+def _performance_columns(args):
+    from build_report import PERFORMANCE_COLUMNS
+    return args.columns or PERFORMANCE_COLUMNS
+
+
+def inspect_database(args):
+    """Print what a database holds, straight from SQLite (no pandas, no indexing)."""
+    for db_path in args.databases:
+        if not os.path.exists(db_path):
+            sys.exit(f'Database not found: {db_path}')
+        uri = f'file:{urllib.parse.quote(os.path.abspath(db_path))}?mode=ro'
+        conn = sqlite3.connect(uri, uri=True)
+        try:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            print(f'{db_path} ({os.path.getsize(db_path) / 1e6:.1f} MB)')
+
+            if 'experiments' in tables:
+                columns = [row[1] for row in conn.execute('PRAGMA table_info(experiments)')]
+                sampler = 'sampler_id' if 'sampler_id' in columns else 'NULL'
+                print('  experiments:')
+                for row in conn.execute(f'SELECT id, name, {sampler}, runcount, timelimit, version, date '
+                                        'FROM experiments ORDER BY id'):
+                    print('    #{} {} sampler_id={} runs/planner={} timelimit={}s {} {}'.format(*row))
+
+            if {'runs', 'plannerConfigs'} <= tables:
+                print('  planners:')
+                for name, runs, solved in conn.execute(
+                        'SELECT plannerConfigs.name, COUNT(runs.id), '
+                        + ('SUM(runs.solved) ' if 'solved' in {row[1] for row in conn.execute('PRAGMA table_info(runs)')}
+                           else 'NULL ')
+                        + 'FROM plannerConfigs LEFT JOIN runs ON runs.plannerid = plannerConfigs.id '
+                          'GROUP BY plannerConfigs.id ORDER BY plannerConfigs.id'):
+                    solved = '' if solved is None else f', {solved} solved'
+                    print(f'    {name}: {runs} runs{solved}')
+                run_columns = [row[1] for row in conn.execute('PRAGMA table_info(runs)')][3:]
+                print(f'  run properties ({len(run_columns)}): {", ".join(run_columns)}')
+
+            if 'progress' in tables:
+                rows = conn.execute('SELECT COUNT(*) FROM progress').fetchone()[0]
+                columns = [row[1] for row in conn.execute('PRAGMA table_info(progress)')]
+                print(f'  progress: {rows} samples ({", ".join(columns)})')
+        finally:
+            conn.close()
+
+
+def summary(args):
+    _require('pandas', 'xlsxwriter')
+    from bootstrap import median_confidence_intervals
+    from comparison import facet_percentage_changes
+    from excel_report import ExcelReport
+    from results_loader import load_databases
+    from summary_stats import grouped_statistics, statistic_table
+
+    columns = _performance_columns(args)
+    df, planner_configs = load_databases(args.databases)
+    with ExcelReport(args.output) as workbook:
+        stats_df = grouped_statistics(df, columns)
+        workbook.write(stats_df.reset_index(), 'Performance Statistics')
+        avg_performance_df = statistic_table(stats_df, 'mean')
+        workbook.write(avg_performance_df, 'Performance Averages', index=True)
+        workbook.write(facet_percentage_changes(stats_df), 'Percentage Changes')
+        if args.ci:
+            median_ci_df, median_diff_df = median_confidence_intervals(df, columns, n_resamples=args.resamples)
+            workbook.write(median_ci_df, 'Median CIs')
+            workbook.write(median_diff_df, 'Median Differences')
+        workbook.write(planner_configs, 'Planner Configs')
+        if args.raw:
+            workbook.write_raw(df)
+    print(f'Summary of {len(df)} runs exported to {args.output}')
+
+
+def convergence(args):
+    _require('pandas', 'matplotlib', 'xlsxwriter')
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from anytime import anytime_bands, experiment_grids, experiment_label
+    from excel_report import ExcelReport
+    from results_loader import load_experiments, load_progress
+
+    if args.mmap:
+        from column_store import open_store
+        progress_df = open_store(args.database).frame('progress')
+    else:
+        progress_df = load_progress(args.database)
+    # Each experiment gets its own grid up to its own time limit
+    grids = experiment_grids(load_experiments(args.database), points=args.points,
+                             spacing='log' if args.log else 'linear')
+    bands = anytime_bands(progress_df, grids)
+
+    with ExcelReport(f'{args.output}.xlsx') as workbook:
+        workbook.write(bands, 'Median Best Cost')
+
+    experiments = list(bands.groupby(['experiment', 'sampler_id'], sort=False, dropna=False, observed=True))
+    fig, axes = plt.subplots(len(experiments), 1, figsize=(10, 6 * len(experiments)), squeeze=False)
+    for ax, (key, experiment_bands) in zip(axes[:, 0], experiments):
+        for name, band in experiment_bands.groupby('name', sort=False):
+            line, = ax.plot(band['time'], band['median'], drawstyle='steps-post', label=name)
+            ax.fill_between(band['time'], band['p25'], band['p75'], step='post', alpha=0.2, color=line.get_color())
+        ax.set_xscale('log' if args.log else 'linear')
+        ax.set_title(f'Median Best Cost over Time, {experiment_label(*key)} (25-75 percentile band)')
+        ax.set_xlabel('Time')
+        ax.set_ylabel('Best Cost')
+        ax.legend(title='Planner')
+    for ext in ('png', 'pdf'):
+        fig.savefig(f'{args.output}.{ext}', bbox_inches='tight')
+    plt.close(fig)
+    print(f'Convergence bands saved to {args.output}.xlsx, .png and .pdf')
+
+
+def compare(args):
+    _require('pandas')
+    from bootstrap import median_confidence_intervals
+    from results_loader import load_databases
+
+    df, _ = load_databases(args.databases)
+    if args.planners:
+        df = df[df['name'].isin(args.planners)]
+    _, differences = median_confidence_intervals(df, args.metric, n_resamples=args.resamples)
+    if args.significant:
+        differences = differences[differences['significant']]
+    print(differences.to_string(index=False))
+    if args.output:
+        differences.to_csv(args.output, index=False)
+        print(f'Median differences saved to {args.output}')
+
+
+def boxplots(args):
+    _require('pandas', 'matplotlib', 'seaborn', 'pypdf')
+    from boxplots import render_box_plots
+    from results_loader import load_databases
+
+    df, _ = load_databases(args.databases)
+    render_box_plots(df, _performance_columns(args), args.output, max_workers=args.jobs)
+    print(f'Box plots saved to {args.output}')
+
+
+def ingest(args):
+    from ingest_logs import ingest_logs
+
+    print(f'Ingesting {len(args.logs)} log file(s) into {args.database}...')
+    ingest_logs(args.logs, args.database, workers=args.jobs)
+    print(f'Database {args.database} is ready')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='bench', description='OMPL benchmark result analysis.')
+    parser.add_argument('--trace', nargs='?', const='trace.json', metavar='PATH',
+                        help='record per-stage time and memory to PATH (default trace.json)')
+    parser.add_argument('--chrome-trace', action='store_true', help='also write a Chrome trace (.chrome.json)')
+    parser.add_argument('--trace-malloc', action='store_true', help='add tracemalloc peaks to the trace (slower)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('inspect', help='show experiments, planners and row counts')
+    command.add_argument('databases', nargs='+')
+    command.set_defaults(handler=inspect_database)
+
+    command = commands.add_parser('summary', help='statistics workbook over one or more databases')
+    command.add_argument('databases', nargs='+')
+    command.add_argument('-o', '--output', default='performance_summary.xlsx')
+    command.add_argument('--columns', nargs='+', help='metrics to summarise (default: all performance columns)')
+    command.add_argument('--ci', action='store_true', help='add bootstrap confidence intervals for the medians')
+    command.add_argument('--resamples', type=int, default=10_000)
+    command.add_argument('--raw', action='store_true', help='include the raw runs table')
+    command.set_defaults(handler=summary)
+
+    command = commands.add_parser('convergence', help='median best cost over time with percentile bands')
+    command.add_argument('database')
+    command.add_argument('-o', '--output', default='best_cost_convergence', help='output path without extension')
+    command.add_argument('--points', type=int, default=21, help='time grid points')
+    command.add_argument('--log', action='store_true', help='log-spaced time grid')
+    command.add_argument('--mmap', action='store_true',
+                         help='read progress from the memory-mapped column store (exported on first use)')
+    command.set_defaults(handler=convergence)
+
+    command = commands.add_parser('compare', help='bootstrap median differences between planners')
+    command.add_argument('databases', nargs='+')
+    command.add_argument('--metric', nargs='+', default=['time', 'best_cost'])
+    command.add_argument('--planners', nargs='+', help='only compare these planners')
+    command.add_argument('--resamples', type=int, default=10_000)
+    command.add_argument('--significant', action='store_true', help='only show significant differences')
+    command.add_argument('-o', '--output', help='also save the table as CSV')
+    command.set_defaults(handler=compare)
+
+    command = commands.add_parser('boxplots', help='one box plot per metric, collected in a PDF')
+    command.add_argument('databases', nargs='+')
+    command.add_argument('-o', '--output', default='performance_box_plots.pdf')
+    command.add_argument('--columns', nargs='+', help='metrics to plot (default: all performance columns)')
+    command.add_argument('-j', '--jobs', type=int, default=None, help='render processes (default: all cores)')
+    command.set_defaults(handler=boxplots)
+
+    command = commands.add_parser('ingest', help='import OMPL benchmark .log files into a database')
+    command.add_argument('logs', nargs='+')
+    command.add_argument('-d', '--database', default='benchmark.db')
+    command.add_argument('-j', '--jobs', type=int, default=None, help='parse processes (default: all cores)')
+    command.set_defaults(handler=ingest)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.trace:
+        import instrument
+        instrument.enable(args.trace, chrome=args.chrome_trace, malloc=args.trace_malloc)
+        with instrument.stage(args.command):
+            args.handler(args)
+    else:
+        args.handler(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,105 +1,88 @@
-import subprocess
 import sys
-import sqlite3
 import pandas as pd
 import plotly.express as px
-from plotly.io import write_image
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 import numpy as np
-
-# Function to install a package
-def install(package):
-    subprocess.check_call([sys.executable, '-m', 'pip', 'install', package])
-
-# Install required packages if not already installed
-try:
-    import pandas as pd
-    import plotly.express as px
-except ImportError:
-    install('pandas')
-    install('plotly')
-    import pandas as pd
-    import plotly.express as px
-
-# Ensure kaleido is installed for image export
-try:
-    import kaleido
-except ImportError:
-    install('kaleido')
-
-# Connect to SQLite database
-print("Connecting to database...")
-conn = sqlite3.connect('mydatabase_gaussian.db')
-
-# Query the progress data
-print("Fetching data from database...")
-progress_query = """
-    SELECT REPLACE(plannerConfigs.name, 'geometric_', '') AS name, progress.*
-    FROM plannerConfigs
-    INNER JOIN runs ON plannerConfigs.id = runs.plannerid
-    INNER JOIN progress ON runs.id = progress.runid
-"""
-
-# Load data into DataFrame
-progress_df = pd.read_sql_query(progress_query, conn)
-
-# Close the connection
-conn.close()
-
-# Print the first few rows of progress_df for debugging
-print("First few rows of progress_df:")
-print(progress_df.head())
-
-# Create 20 equally spaced intervals within the range of 0 to 100
-intervals = np.linspace(0, 100, 21)  # 21 points to create 20 intervals
-
-# Assign interval labels to each time point
-progress_df['interval'] = pd.cut(progress_df['time'], bins=intervals, labels=False)
-
-# Compute median best cost for each planner over these intervals
-median_best_cost_df = progress_df.groupby(['interval', 'name'])['best_cost'].median().reset_index()
-
-# Map interval numbers to the start of the interval
-interval_mapping = {i: int(intervals[i]) for i in range(len(intervals) - 1)}
-median_best_cost_df['interval_label'] = median_best_cost_df['interval'].map(interval_mapping)
-
-# Calculate percentage change in best cost over intervals
+from anytime import anytime_bands, experiment_grids, experiment_label
+from excel_report import ExcelReport
+from image_export import export_figures
+from progress_queries import interval_medians
+from results_loader import load_experiments, load_progress
+
+db_path = 'mydatabase_gaussian.db'
+experiments_df = load_experiments(db_path)
+
+# Median best cost per planner over 20 equal intervals of each experiment's time limit
+# (60 s Twistycool, 100 s cubicles), computed inside SQLite; experiments sharing
+# a name under different samplers are kept apart
+median_best_cost_df = pd.concat(
+    [interval_medians(db_path, start=0, stop=experiment.timelimit, bins=20, experimentid=experiment.id)
+     .assign(experiment=experiment.name, sampler_id=getattr(experiment, 'sampler_id', None))
+     for experiment in experiments_df.itertuples()],
+    ignore_index=True)
+median_best_cost_df = median_best_cost_df[['experiment', 'sampler_id'] + list(median_best_cost_df.columns[:-2])]
+
+# Print the first few rows for debugging
+print("First few rows of median_best_cost_df:")
+print(median_best_cost_df.head())
+
+# Calculate percentage change in best cost over intervals, within each experiment
 percentage_change_df = median_best_cost_df.copy()
-percentage_change_df.sort_values(by=['name', 'interval'], inplace=True)
-percentage_change_df['best_cost_change'] = percentage_change_df.groupby('name')['best_cost'].pct_change() * 100
-percentage_change_df['best_cost_change'].fillna(0, inplace=True)  # Replace NaN values with 0
+percentage_change_df.sort_values(by=['experiment', 'sampler_id', 'name', 'interval'], inplace=True)
+percentage_change_df['best_cost_change'] = percentage_change_df.groupby(
+    ['experiment', 'sampler_id', 'name'], dropna=False)['best_cost'].pct_change() * 100
+percentage_change_df['best_cost_change'] = percentage_change_df['best_cost_change'].fillna(0)  # Replace NaN values with 0
+
+# Carry each run's best cost forward onto its experiment's time grid and take
+# median/percentile bands per (experiment, planner); pass --log for log-spaced grid points
+progress_df = load_progress(db_path)
+grids = experiment_grids(experiments_df, points=21, spacing='log' if '--log' in sys.argv else 'linear')
+bands_df = anytime_bands(progress_df, grids, percentiles=(25, 75))
 
 # Save all data to an Excel file
-with pd.ExcelWriter('best_cost_analysis.xlsx') as writer:
-    # Sheet 1: Complete best cost info
-    progress_df.to_excel(writer, sheet_name='Complete_Best_Cost_Info', index=False)
+with ExcelReport('best_cost_analysis.xlsx') as workbook:
+    # Sheet 1: Median best cost for 20 intervals
+    workbook.write(median_best_cost_df, 'Median_Best_Cost_By_Interval')
     
-    # Sheet 2: Median best cost for 20 intervals
-    median_best_cost_df.to_excel(writer, sheet_name='Median_Best_Cost_By_Interval', index=False)
-    
-    # Sheet 3: Percentage change in best cost over time
-    percentage_change_df.to_excel(writer, sheet_name='Percentage_Change_Best_Cost', index=False)
+    # Sheet 2: Percentage change in best cost over time
+    workbook.write(percentage_change_df, 'Percentage_Change_Best_Cost')
+
+    # Sheet 3: Median best cost with 25-75 percentile band on the time grid
+    workbook.write(bands_df, 'Median_Best_Cost_Bands')
 
 print("Saved best cost analysis to best_cost_analysis.xlsx")
 
 # Plotting
 print("Creating median best cost plot for all planners...")
-fig = px.line(
-    median_best_cost_df, 
-    x='interval_label', 
-    y='best_cost', 
-    color='name', 
-    title='Median Best Cost over Time for All Planners (20 Intervals)', 
-    line_shape='linear'
-)
+colors = px.colors.qualitative.Plotly
+experiments = list(bands_df.groupby(['experiment', 'sampler_id'], sort=False, dropna=False, observed=True))
+planners = list(pd.unique(bands_df['name']))
+# One panel per experiment, each on its own time axis
+fig = make_subplots(rows=len(experiments), cols=1,
+                    subplot_titles=[experiment_label(*key) for key, _ in experiments])
+for row, (_, experiment_df) in enumerate(experiments, start=1):
+    for name, planner_df in experiment_df.groupby('name', sort=False, observed=True):
+        color = colors[planners.index(name) % len(colors)]
+        # Shaded 25-75 percentile band behind the median line
+        fig.add_trace(go.Scatter(
+            x=np.concatenate([planner_df['time'], planner_df['time'][::-1]]),
+            y=np.concatenate([planner_df['p75'], planner_df['p25'][::-1]]),
+            fill='toself', fillcolor=color, opacity=0.2, line=dict(width=0),
+            legendgroup=name, showlegend=False, hoverinfo='skip',
+        ), row=row, col=1)
+        fig.add_trace(go.Scatter(
+            x=planner_df['time'], y=planner_df['median'], mode='lines+markers', name=name,
+            legendgroup=name, showlegend=row == 1, line=dict(color=color, shape='hv'),
+        ), row=row, col=1)
+    fig.update_xaxes(title_text='Time', type='log' if '--log' in sys.argv else 'linear', row=row, col=1)
+    fig.update_yaxes(title_text='Best Cost', row=row, col=1)
 fig.update_layout(
-    xaxis_title='Time Interval', 
-    yaxis_title='Best Cost',
-    xaxis=dict(tickmode='array', tickvals=list(interval_mapping.values()), ticktext=[str(val) for val in interval_mapping.values()])
+    title='Median Best Cost over Time for All Planners (25-75 percentile band)',
+    height=450 * len(experiments),
 )
 
-# Save plot as image and PDF
-fig.write_image("median_best_cost_over_time.png")
-fig.write_image("median_best_cost_over_time.pdf")
+# Save plot as image and PDF in one export batch
+export_figures([(fig, "median_best_cost_over_time")], formats=('png', 'pdf'))
 
 print("Saved median best cost plot to median_best_cost_over_time.pdf")
-
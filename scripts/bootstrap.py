@@ -0,0 +1,178 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from instrument import traced
+from parallel import pool_context
+from summary_stats import FACET_KEYS, GROUP_KEYS, group_labels
+
+# Run indices drawn at once per block (resamples x runs); the values gathered
+# through them are this times the metrics being resampled
+BLOCK_ELEMENTS = 200_000
+
+# Bootstrap medians held in memory at once (groups x resamples x metrics);
+# median_confidence_intervals resamples the metrics in chunks of this size
+BOOT_ELEMENTS = 20_000_000
+
+
+def _bootstrap_medians(args):
+    """Bootstrap medians of every metric of one group: (n_resamples, metrics)."""
+    values, n_resamples, seed = args
+    rng = np.random.default_rng(seed)
+    n_runs, n_metrics = values.shape
+    medians = np.empty((n_resamples, n_metrics))
+    if n_runs == 0:
+        medians.fill(np.nan)
+        return medians
+
+    # Blocks depend on the run count only, so a group is resampled the same
+    # way whichever metrics are passed along with it
+    block = max(1, BLOCK_ELEMENTS // n_runs)
+    for start in range(0, n_resamples, block):
+        stop = min(start + block, n_resamples)
+        # One index matrix resamples the runs for all metrics together
+        idx = rng.integers(0, n_runs, size=(stop - start, n_runs))
+        medians[start:stop] = np.nanmedian(values[idx], axis=1)
+    return medians
+
+
+@traced()
+def bootstrap_medians(df, columns, keys=GROUP_KEYS, n_resamples=10_000, seed=0, max_workers=None):
+    """Bootstrap distributions of the per-group medians, one process task per group.
+
+    Returns (labels, columns, observed, boot) with observed of shape
+    (groups, metrics) and boot of shape (groups, n_resamples, metrics).
+    Groups are resampled serially where workers cannot be forked.
+    """
+    keys = [key for key in keys if key in df.columns]
+    columns = [column for column in columns if column in df.columns]
+    grouped = df.groupby(keys, sort=True, dropna=False, observed=True)
+    index = pd.MultiIndex.from_tuples(list(grouped.groups)) if len(keys) > 1 else pd.Index(list(grouped.groups))
+    labels = list(group_labels(index))
+    values = [group[columns].to_numpy(dtype='float64') for _, group in grouped]
+    seeds = np.random.SeedSequence(seed).spawn(len(values))
+
+    observed = np.array([np.nanmedian(v, axis=0) if len(v) else np.full(len(columns), np.nan)
+                         for v in values]).reshape(len(values), len(columns))
+    jobs = [(v, n_resamples, s) for v, s in zip(values, seeds)]
+    max_workers = min(max_workers or os.cpu_count() or 1, max(len(jobs), 1))
+    context = pool_context()
+    if max_workers > 1 and context is not None:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+            boot = list(pool.map(_bootstrap_medians, jobs))
+    else:
+        boot = [_bootstrap_medians(job) for job in jobs]
+    return labels, columns, observed, np.stack(boot) if boot else np.empty((0, n_resamples, len(columns)))
+
+
+def _interval(samples, confidence, axis=-1):
+    """(low, high) percentile interval along axis, ignoring NaNs (NaN where none are left).
+
+    Same linear interpolation as np.nanquantile, but one sort for all rows
+    instead of a Python-level pass per row.
+    """
+    alpha = (1 - confidence) / 2
+    ordered = np.sort(np.moveaxis(samples, axis, -1), axis=-1)  # NaNs sort last
+    counts = np.count_nonzero(~np.isnan(ordered), axis=-1)
+    last = np.maximum(counts - 1, 0)
+    bounds = []
+    for q in (alpha, 1 - alpha):
+        position = q * last
+        below = np.floor(position).astype(np.int64)
+        above = np.minimum(below + 1, last)
+        low = np.take_along_axis(ordered, below[..., np.newaxis], axis=-1)[..., 0]
+        high = np.take_along_axis(ordered, above[..., np.newaxis], axis=-1)[..., 0]
+        value = np.where(high == low, low, low + (high - low) * (position - below))
+        bounds.append(np.where(counts > 0, value, np.nan))
+    return bounds
+
+
+def _difference_intervals(boot, baseline, compared, confidence):
+    # CI of every pair's difference of medians, one broadcast per metric over a
+    # block of pairs: (pairs, metrics) arrays of low and high bounds
+    n_pairs, n_resamples = len(baseline), boot.shape[1]
+    low = np.empty((n_pairs, boot.shape[2]))
+    high = np.empty_like(low)
+    block = max(1, BLOCK_ELEMENTS // max(n_resamples, 1))
+    for metric in range(boot.shape[2]):
+        samples = boot[:, :, metric]
+        for start in range(0, n_pairs, block):
+            stop = min(start + block, n_pairs)
+            differences = samples[compared[start:stop]] - samples[baseline[start:stop]]
+            low[start:stop, metric], high[start:stop, metric] = _interval(differences, confidence)
+    return low, high
+
+
+def _facet_pairs(group_keys, facets):
+    # (baseline, compared) indices of every unordered pair of groups sharing
+    # their facet values, in group order within each facet
+    if facets:
+        codes = group_keys.groupby(facets, sort=False, dropna=False).ngroup().to_numpy()
+    else:
+        codes = np.zeros(len(group_keys), dtype=np.int64)
+    baseline, compared = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+    for code in np.unique(codes):
+        members = np.flatnonzero(codes == code)
+        upper = np.triu_indices(len(members), k=1)
+        baseline.append(members[upper[0]])
+        compared.append(members[upper[1]])
+    return np.concatenate(baseline), np.concatenate(compared)
+
+
+@traced()
+def median_confidence_intervals(df, columns, keys=GROUP_KEYS, n_resamples=10_000,
+                                confidence=0.95, seed=0, max_workers=None, facets=FACET_KEYS):
+    """Percentile bootstrap confidence intervals for the median of every metric.
+
+    Returns (ci_df, difference_df): ci_df has one row per (group, metric);
+    difference_df has one row per (baseline, compared, metric) for every
+    unordered pair of groups in the same facet (sampler_id and experiment),
+    with the facet columns, the CI of median(compared) - median(baseline)
+    and whether it excludes zero. Metrics are bootstrapped in chunks so at
+    most about BOOT_ELEMENTS medians are held at once.
+    """
+    keys = [key for key in keys if key in df.columns]
+    columns = [column for column in columns if column in df.columns]
+    facets = [key for key in facets if key in keys]
+    grouped = df.groupby(keys, sort=True, dropna=False, observed=True)
+    n_groups = grouped.ngroups
+    group_keys = pd.DataFrame(list(grouped.groups), columns=keys)
+    chunk = max(1, BOOT_ELEMENTS // max(n_groups * n_resamples, 1))
+    baseline, compared = _facet_pairs(group_keys, facets)
+
+    labels, observed, ci_bounds, difference_bounds = [], [], [], []
+    for start in range(0, max(len(columns), 1), chunk):
+        labels, _, chunk_observed, boot = bootstrap_medians(
+            df, columns[start:start + chunk], keys, n_resamples, seed, max_workers)
+        with np.errstate(all='ignore'):
+            ci_bounds.append(_interval(boot, confidence, axis=1) if n_groups
+                             else (chunk_observed, chunk_observed))
+            difference_bounds.append(_difference_intervals(boot, baseline, compared, confidence))
+        observed.append(chunk_observed)
+        del boot
+    observed = np.hstack(observed)
+    low, high = (np.hstack([bounds[k] for bounds in ci_bounds]) for k in (0, 1))
+    diff_low, diff_high = (np.hstack([bounds[k] for bounds in difference_bounds]) for k in (0, 1))
+    n_metrics = len(columns)
+
+    ci_df = pd.DataFrame({
+        'group': np.repeat(labels, n_metrics),
+        'metric': np.tile(columns, n_groups),
+        'median': observed.ravel(),
+        'ci_low': low.ravel(),
+        'ci_high': high.ravel(),
+        'confidence': confidence,
+    })
+    difference_df = pd.DataFrame({
+        **{facet: np.repeat(group_keys[facet].to_numpy()[baseline], n_metrics) for facet in facets},
+        'baseline': np.repeat(np.asarray(labels, dtype=object)[baseline], n_metrics),
+        'compared': np.repeat(np.asarray(labels, dtype=object)[compared], n_metrics),
+        'metric': np.tile(columns, len(baseline)),
+        'median_difference': (observed[compared] - observed[baseline]).ravel(),
+        'ci_low': diff_low.ravel(),
+        'ci_high': diff_high.ravel(),
+        'significant': ((diff_low > 0) | (diff_high < 0)).ravel(),
+    })
+    return ci_df, difference_df
@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from instrument import traced
+from parallel import pool_context
+from pdf_report import assemble_pdf
+
+# Each facet combination gets its own set of box plots
+FACET_KEYS = ['sampler_id', 'experiment']
+
+
+def _init_worker():
+    # Workers never open a window; select the headless backend before pyplot loads
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def _render_box_plot(job):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    data, column, order, palette, title, png_path, pdf_path = job
+    fig = plt.figure(figsize=(16, 10))  # Increased figure size for better readability
+    sns.boxplot(data=data, x='name', y=column, hue='name', order=order, hue_order=order,
+                palette=palette, legend=False)
+    plt.title(title)
+    plt.xlabel('Planner Name')
+    plt.ylabel(column)
+    plt.xticks(rotation=45, ha='right')  # Rotate x-axis labels and align them to the right
+
+    fig.savefig(pdf_path)
+    fig.savefig(png_path, bbox_inches='tight')
+    plt.close(fig)
+    return column, png_path, pdf_path
+
+
+def _facet_groups(df, facets):
+    facets = [key for key in facets if key in df.columns and df[key].nunique(dropna=False) > 1]
+    if not facets:
+        yield '', '', df
+        return
+    for values, group in df.groupby(facets, sort=True, dropna=False, observed=True):
+        values = values if isinstance(values, tuple) else (values,)
+        label = ', '.join(f'{key}={value}' for key, value in zip(facets, values))
+        suffix = '_' + '_'.join(str(value) for value in values)
+        yield label, suffix, group
+
+
+def _palette(planners):
+    import seaborn as sns
+
+    colors = sns.color_palette("husl", len(planners))  # Use a color palette with distinct colors
+    return dict(zip(planners, colors))
+
+
+def _jobs(df, columns, facets, image_pattern, page_dir):
+    planners = list(df['name'].unique())
+    palette = _palette(planners)
+
+    page = 0
+    for label, suffix, group in _facet_groups(df, facets):
+        order = [planner for planner in planners if planner in set(group['name'])]
+        for column in columns:
+            title = f'Box Plot of {column} for Each Planner'
+            if label:
+                title += f' ({label})'
+            png_path = image_pattern.format(column=column, facet=suffix)
+            pdf_path = os.path.join(page_dir, f'{page:05d}.pdf')
+            page += 1
+            # Only ship the two columns the plot needs to the worker
+            yield group[['name', column]], column, order, palette, title, png_path, pdf_path
+
+
+@traced()
+def render_box_plots(df, columns, pdf_path, facets=FACET_KEYS,
+                     image_pattern='{column}{facet}_box_plot.png', max_workers=None):
+    """Render one box plot per metric (and facet) in a process pool.
+
+    Each figure is saved as PNG plus a single-page PDF; the pages are then
+    concatenated into pdf_path in metric order. At most two jobs per worker
+    are in flight, so peak memory does not grow with the number of plots.
+    Without fork (see pool_context), or with max_workers=1, the plots are
+    rendered one by one in this process. Returns the files written, the
+    PDF first and then the PNGs.
+    """
+    columns = [column for column in columns if column in df.columns]
+    max_workers = max_workers or os.cpu_count() or 1
+    context = pool_context()
+    page_dir = tempfile.mkdtemp(prefix='box_plots_')
+    pages = []
+    images = []
+
+    def collect(column, png_path, page_path):
+        print(f'Saved box plot for {column} as {png_path}')
+        pages.append(page_path)
+        images.append(png_path)
+
+    try:
+        jobs = _jobs(df, columns, facets, image_pattern, page_dir)
+        if context is None or max_workers == 1:
+            _init_worker()
+            for job in jobs:
+                collect(*_render_box_plot(job))
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=context,
+                                     initializer=_init_worker) as pool:
+                pending = deque()
+                for job in jobs:
+                    pending.append(pool.submit(_render_box_plot, job))
+                    if len(pending) >= 2 * max_workers:
+                        collect(*pending.popleft().result())
+                while pending:
+                    collect(*pending.popleft().result())
+
+        assemble_pdf(pages, pdf_path)
+    finally:
+        shutil.rmtree(page_dir, ignore_errors=True)
+    return [pdf_path] + images
+
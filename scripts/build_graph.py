@@ -0,0 +1,170 @@
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import re
+import time
+
+from instrument import stage
+
+# Node results and output records live here, relative to the working directory
+BUILD_CACHE_DIR = os.path.join('.results_cache', 'build')
+
+
+def file_fingerprint(path):
+    """Cheap identity of a file's current version (size and mtime), or None if missing."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _function_fingerprint(func):
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        source = ''
+    return f'{func.__module__}.{func.__qualname__}:{hashlib.sha1(source.encode()).hexdigest()}'
+
+
+class Node:
+    def __init__(self, name, func, inputs=(), params=None, files=(), outputs=(), returns_outputs=False):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.params = dict(params or {})
+        self.files = list(files)
+        self.outputs = list(outputs)
+        self.returns_outputs = returns_outputs
+
+
+class BuildGraph:
+    """Report pipeline (load -> aggregate -> plot -> assemble) with content-hash caching.
+
+    A node's key hashes its function source, its params, the fingerprints of
+    the files it reads and the keys of its input nodes, so editing any of
+    them invalidates the node and everything downstream. Node values are
+    pickled under their key; nodes that write files (outputs) are fresh only
+    while those files still exist unchanged, and a node is only current if
+    all its inputs are too. Current nodes are never run, and their cached
+    values are only unpickled when a stale node needs them.
+    """
+
+    def __init__(self, cache_dir=BUILD_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.nodes = {}
+        self._keys = {}
+        self._values = {}
+        self._current = {}
+        self.rebuilt = []
+
+    def add(self, name, func, inputs=(), params=None, files=(), outputs=(), returns_outputs=False):
+        """Register a node: func(*input values, **params) -> value.
+
+        files are read by the node (databases, code it depends on); outputs
+        are the files it writes, and should be returned by func. Nodes whose
+        files are only known once they ran (e.g. one image per facet) set
+        returns_outputs and return the list of files they wrote.
+        """
+        if name in self.nodes:
+            raise ValueError(f'Duplicate build node {name!r}')
+        for dependency in inputs:
+            if dependency not in self.nodes:
+                raise ValueError(f'Build node {name!r} depends on unknown node {dependency!r}')
+        self.nodes[name] = Node(name, func, inputs, params, files, outputs, returns_outputs)
+        return name
+
+    def key(self, name):
+        if name not in self._keys:
+            node = self.nodes[name]
+            ident = json.dumps([
+                node.name, _function_fingerprint(node.func), node.params,
+                [[path, file_fingerprint(path)] for path in node.files],
+                [self.key(dependency) for dependency in node.inputs],
+                node.outputs,
+            ], sort_keys=True, default=repr)
+            self._keys[name] = hashlib.sha1(ident.encode()).hexdigest()[:16]
+        return self._keys[name]
+
+    def _record_path(self, name):
+        return os.path.join(self.cache_dir, f'{name}-{self.key(name)}.json')
+
+    def _value_path(self, name):
+        return os.path.join(self.cache_dir, f'{name}-{self.key(name)}.pkl')
+
+    def is_fresh(self, name):
+        """True if the node's cached value exists and its output files are unchanged."""
+        try:
+            with open(self._record_path(name)) as f:
+                record = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return False
+        if not os.path.exists(self._value_path(name)):
+            return False
+        return all(file_fingerprint(path) == fingerprint for path, fingerprint in record['outputs'])
+
+    def is_current(self, name):
+        """True if the node and everything it depends on are fresh."""
+        if name not in self._current:
+            self._current[name] = (all(self.is_current(dependency) for dependency in self.nodes[name].inputs)
+                                   and self.is_fresh(name))
+        return self._current[name]
+
+    def _run(self, name):
+        node = self.nodes[name]
+        args = [self.value(dependency) for dependency in node.inputs]
+        print(f'Building {name}...')
+        start = time.perf_counter()
+        with stage(f'build {name}'):
+            value = node.func(*args, **node.params)
+        elapsed = time.perf_counter() - start
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self._value_path(name) + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._value_path(name))
+        outputs = node.outputs + [path for path in (value if node.returns_outputs else [])
+                                  if path not in node.outputs]
+        record = {'node': name, 'seconds': round(elapsed, 3),
+                  'outputs': [[path, file_fingerprint(path)] for path in outputs]}
+        with open(self._record_path(name), 'w') as f:
+            json.dump(record, f)
+        self._drop_stale(name)
+        self._current[name] = True
+        self.rebuilt.append(name)
+        return value
+
+    def _drop_stale(self, name):
+        # Older versions of a node are never read again
+        pattern = re.compile(re.escape(name) + r'-([0-9a-f]{16})\.(json|pkl)')
+        for entry in os.listdir(self.cache_dir):
+            match = pattern.fullmatch(entry)
+            if match and match.group(1) != self.key(name):
+                os.remove(os.path.join(self.cache_dir, entry))
+
+    def value(self, name):
+        """Value of a node, rebuilding it (and stale inputs) only if needed."""
+        if name not in self._values:
+            if self.is_current(name):
+                with open(self._value_path(name), 'rb') as f:
+                    self._values[name] = pickle.load(f)
+            else:
+                self._values[name] = self._run(name)
+        return self._values[name]
+
+    def build(self, targets=None):
+        """Bring the targets (default: every node nothing depends on) up to date.
+
+        Returns the names of the nodes that had to be rebuilt.
+        """
+        if targets is None:
+            used = {dependency for node in self.nodes.values() for dependency in node.inputs}
+            targets = [name for name in self.nodes if name not in used]
+        start = len(self.rebuilt)
+        for name in targets:
+            if not self.is_current(name):
+                self.value(name)
+        return self.rebuilt[start:]
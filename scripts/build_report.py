@@ -0,0 +1,164 @@
+import argparse
+import os
+import time
+
+from build_graph import BUILD_CACHE_DIR, BuildGraph
+from database import ensure_indexes
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Define performance measure columns
+PERFORMANCE_COLUMNS = [
+    'approximate_solution', 'best_cost', 'correct_solution', 'correct_solution_strict',
+    'graph_motions', 'graph_states', 'iterations', 'memory', 'simplification_time',
+    'simplified_correct_solution', 'simplified_correct_solution_strict',
+    'simplified_solution_clearance', 'simplified_solution_length',
+    'simplified_solution_segments', 'simplified_solution_smoothness',
+    'solution_clearance', 'solution_difference', 'solution_length',
+    'solution_segments', 'solution_smoothness', 'solved', 'status', 'time',
+    'valid_segment_fraction'
+]
+
+
+def _code(*modules):
+    # Library code a node depends on; editing it invalidates the node
+    return [os.path.join(SCRIPT_DIR, f'{module}.py') for module in modules]
+
+
+# Node functions import their heavy dependencies themselves, so an
+# up-to-date report never imports pandas or matplotlib at all
+
+# Tables already read in this build, by (table, cache key)
+_frames = {}
+
+
+def _load_node(table, db_path):
+    # Fills the results_loader Parquet cache and returns a reference to it;
+    # only this small reference is pickled, never a copy of the table
+    from results_loader import cache_key, load_progress, load_runs
+    load = load_runs if table == 'runs' else load_progress
+    key = cache_key(db_path)
+    _frames[(table, key)] = load(db_path)
+    return {'table': table, 'database': os.path.abspath(db_path), 'cache_key': key}
+
+
+def _frame(ref):
+    """DataFrame behind a load node's reference, read through the results_loader cache."""
+    from results_loader import load_progress, load_runs
+    key = (ref['table'], ref['cache_key'])
+    if key not in _frames:
+        load = load_runs if ref['table'] == 'runs' else load_progress
+        _frames[key] = load(ref['database'])
+    return _frames[key]
+
+
+def load_runs_node(db_path):
+    return _load_node('runs', db_path)
+
+
+def load_progress_node(db_path):
+    return _load_node('progress', db_path)
+
+
+def statistics_node(runs, columns):
+    from summary_stats import grouped_statistics
+    return grouped_statistics(_frame(runs), columns)
+
+
+def averages_node(stats_df):
+    from summary_stats import statistic_table
+    return statistic_table(stats_df, 'mean')
+
+
+def changes_node(stats_df):
+    from comparison import facet_percentage_changes
+    return facet_percentage_changes(stats_df)
+
+
+def median_ci_node(runs, columns, n_resamples):
+    from bootstrap import median_confidence_intervals
+    return median_confidence_intervals(_frame(runs), columns, n_resamples=n_resamples)
+
+
+def workbook_node(runs, stats_df, avg_df, change_df, median_cis, path):
+    from excel_report import ExcelReport
+    median_ci_df, median_diff_df = median_cis
+    with ExcelReport(path) as workbook:
+        workbook.write(stats_df.reset_index(), 'Performance Statistics')
+        workbook.write(avg_df, 'Performance Averages', index=True)
+        workbook.write(change_df, 'Percentage Changes')
+        workbook.write(median_ci_df, 'Median CIs')
+        workbook.write(median_diff_df, 'Median Differences')
+        workbook.write_raw(_frame(runs))
+    return path
+
+
+def box_plots_node(runs, columns, path):
+    from boxplots import render_box_plots
+    # One plot per metric and facet, rendered in parallel like the scripts do
+    return render_box_plots(_frame(runs), columns, path)
+
+
+def best_cost_node(progress, png_path, pdf_path, max_points):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from traces import plot_best_cost_runs
+
+    fig = plt.figure(figsize=(10, 6))
+    plot_best_cost_runs(plt.gca(), _frame(progress), max_points=max_points)
+    plt.title('Change in Best Cost over Time')
+    plt.xlabel('Time')
+    plt.ylabel('Best Cost')
+    plt.legend(title='Planner')
+    fig.savefig(pdf_path)
+    fig.savefig(png_path, bbox_inches='tight')
+    plt.close(fig)
+    return png_path, pdf_path
+
+
+def report_graph(db_path, columns=PERFORMANCE_COLUMNS, n_resamples=10_000, max_points=500,
+                 cache_dir=BUILD_CACHE_DIR):
+    """load -> aggregate -> plot -> assemble graph for one database's performance report."""
+    graph = BuildGraph(cache_dir)
+    db = [db_path]
+    graph.add('runs', load_runs_node, params={'db_path': db_path}, files=db + _code('results_loader', 'database'))
+    graph.add('progress', load_progress_node, params={'db_path': db_path},
+              files=db + _code('results_loader', 'database'))
+
+    graph.add('statistics', statistics_node, ['runs'], {'columns': columns}, _code('summary_stats'))
+    graph.add('averages', averages_node, ['statistics'], files=_code('summary_stats'))
+    graph.add('changes', changes_node, ['statistics'], files=_code('comparison', 'summary_stats'))
+    graph.add('median_cis', median_ci_node, ['runs'], {'columns': columns, 'n_resamples': n_resamples},
+              _code('bootstrap', 'summary_stats'))
+    graph.add('workbook', workbook_node, ['runs', 'statistics', 'averages', 'changes', 'median_cis'],
+              {'path': 'performance_summary.xlsx'}, _code('excel_report'), outputs=['performance_summary.xlsx'])
+
+    graph.add('box_plots', box_plots_node, ['runs'],
+              {'columns': columns, 'path': 'performance_box_plots.pdf'},
+              _code('boxplots', 'pdf_report', 'parallel'), outputs=['performance_box_plots.pdf'],
+              returns_outputs=True)
+
+    graph.add('best_cost', best_cost_node, ['progress'],
+              {'png_path': 'best_cost_over_time.png', 'pdf_path': 'best_cost_over_time.pdf', 'max_points': max_points},
+              _code('traces'), outputs=['best_cost_over_time.png', 'best_cost_over_time.pdf'])
+    return graph
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the performance report, rebuilding only stale parts.')
+    parser.add_argument('database', nargs='?', default='mydatabase_uniform.db')
+    parser.add_argument('--resamples', type=int, default=10_000, help='bootstrap resamples for the median CIs')
+    parser.add_argument('--max-points', type=int, default=500, help='points drawn per run in the best cost plot')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    # Indexing changes the file, so do it before the database is fingerprinted
+    ensure_indexes(args.database)
+    graph = report_graph(args.database, n_resamples=args.resamples, max_points=args.max_points)
+    rebuilt = graph.build()
+    elapsed = time.perf_counter() - start
+    if rebuilt:
+        print(f'Rebuilt {len(rebuilt)} of {len(graph.nodes)} steps in {elapsed:.2f}s')
+    else:
+        print(f'Report is up to date ({elapsed:.3f}s)')
@@ -0,0 +1,189 @@
+import argparse
+import glob
+import itertools
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from ingest_logs import ingest_logs
+
+# benchmark_planners takes argv[1] = benchmark id (0 cubicles, 1 Twistycool)
+# and argv[2] = valid state sampler id (0 uniform ... 4 bridge test)
+DEFAULT_SPEC = {
+    'executable': ['./benchmark_planners'],
+    'benchmarks': [0, 1],
+    'samplers': [0, 1, 2, 3, 4],
+    'timeout': None,
+    'env': {},
+}
+
+# Written by a job that finished; a rerun skips jobs that have it
+DONE_FILE = 'job.json'
+CONSOLE_FILE = 'console.txt'
+
+
+def load_spec(path=None, **overrides):
+    """Campaign spec: DEFAULT_SPEC, updated from a JSON file and non-None overrides.
+
+    executable may be a string (split like a shell command) or a list.
+    """
+    spec = dict(DEFAULT_SPEC)
+    if path:
+        with open(path) as f:
+            spec.update(json.load(f))
+    spec.update({key: value for key, value in overrides.items() if value is not None})
+    if isinstance(spec['executable'], str):
+        spec['executable'] = shlex.split(spec['executable'])
+    return spec
+
+
+def expand_jobs(spec, work_dir):
+    """One independent job per (benchmark, sampler), each with its own working directory."""
+    # Files named by the command (the executable, a script) are resolved
+    # before the jobs change directory
+    command = [os.path.abspath(arg) if os.sep in arg and os.path.exists(arg) else arg
+               for arg in spec['executable']]
+    jobs = []
+    for benchmark, sampler in itertools.product(spec['benchmarks'], spec['samplers']):
+        jobs.append({
+            'benchmark': benchmark, 'sampler': sampler,
+            'command': command + [str(benchmark), str(sampler)],
+            'dir': os.path.abspath(os.path.join(work_dir, f'benchmark{benchmark}_sampler{sampler}')),
+        })
+    return jobs
+
+
+def usable_cores():
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _job_logs(job_dir):
+    return sorted(glob.glob(os.path.join(job_dir, '*.log')))
+
+
+def run_job(job, timeout=None, env=None):
+    """Run one job in its directory, capturing its console; returns the job record.
+
+    Stale logs of an earlier attempt are removed first, so every log left
+    in the directory of a successful job belongs to this run.
+    """
+    os.makedirs(job['dir'], exist_ok=True)
+    for stale in _job_logs(job['dir']) + [os.path.join(job['dir'], DONE_FILE)]:
+        if os.path.exists(stale):
+            os.remove(stale)
+
+    start = time.perf_counter()
+    with open(os.path.join(job['dir'], CONSOLE_FILE), 'w') as console:
+        try:
+            returncode = subprocess.run(job['command'], cwd=job['dir'], stdout=console, stderr=subprocess.STDOUT,
+                                        timeout=timeout, env={**os.environ, **(env or {})}).returncode
+            error = None if returncode == 0 else f'exit status {returncode}'
+        except subprocess.TimeoutExpired:
+            error = f'timed out after {timeout}s'
+        except OSError as e:
+            error = str(e)
+    logs = _job_logs(job['dir'])
+    if error is None and not logs:
+        error = 'no log file written'
+
+    record = dict(job, seconds=round(time.perf_counter() - start, 3), error=error,
+                  logs=[os.path.basename(log) for log in logs])
+    if error is None:
+        with open(os.path.join(job['dir'], DONE_FILE), 'w') as f:
+            json.dump(record, f, indent=1)
+    return record
+
+
+def _finished(job):
+    # Record of an earlier successful run of the same command, if its logs are still there
+    try:
+        with open(os.path.join(job['dir'], DONE_FILE)) as f:
+            record = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    logs = [os.path.join(job['dir'], log) for log in record['logs']]
+    if record['command'] != job['command'] or not all(os.path.exists(log) for log in logs):
+        return None
+    return record
+
+
+def run_campaign(spec, work_dir='campaign', db_path='campaign.db', workers=None, force=False):
+    """Run every (benchmark, sampler) job in parallel, then ingest all logs into one database.
+
+    Jobs are separate benchmark_planners processes, so a thread per running
+    job is enough to drive them; workers defaults to the usable cores. Jobs
+    finished by an earlier call are skipped unless force is set. The
+    database is only written when every job succeeded, and is rebuilt from
+    all the campaign's logs. Returns the job records.
+    """
+    jobs = expand_jobs(spec, work_dir)
+    workers = workers or usable_cores()
+    os.makedirs(work_dir, exist_ok=True)
+
+    records = []
+    pending = []
+    for job in jobs:
+        record = None if force else _finished(job)
+        if record:
+            print(f'benchmark {job["benchmark"]} sampler {job["sampler"]}: already done')
+            records.append(record)
+        else:
+            pending.append(job)
+
+    print(f'Running {len(pending)} of {len(jobs)} job(s) with {workers} worker(s)...')
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_job, job, spec['timeout'], spec['env']) for job in pending]
+        for future in as_completed(futures):
+            record = future.result()
+            status = 'failed: ' + record['error'] if record['error'] else f'{len(record["logs"])} log(s)'
+            print(f'benchmark {record["benchmark"]} sampler {record["sampler"]}: '
+                  f'{status} in {record["seconds"]:.1f}s')
+            records.append(record)
+
+    records.sort(key=lambda record: (record['benchmark'], record['sampler']))
+    with open(os.path.join(work_dir, 'campaign.json'), 'w') as f:
+        json.dump({'spec': spec, 'database': os.path.abspath(db_path), 'jobs': records}, f, indent=1)
+
+    failed = [record for record in records if record['error']]
+    if failed:
+        print(f'{len(failed)} job(s) failed, see {CONSOLE_FILE} in their directories; '
+              f'{db_path} was not written')
+        return records
+
+    logs = [os.path.join(record['dir'], log) for record in records for log in record['logs']]
+    # Rebuilt from scratch, so rerunning a campaign never duplicates experiments
+    for path in (db_path, db_path + '-wal', db_path + '-shm'):
+        if os.path.exists(path):
+            os.remove(path)
+    print(f'Ingesting {len(logs)} log file(s) into {db_path}...')
+    ingest_logs(logs, db_path)
+    return records
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Run benchmark_planners for every (benchmark, sampler) pair in parallel '
+                    'and collect the logs into one database.')
+    parser.add_argument('spec', nargs='?', help='JSON campaign spec (executable, benchmarks, samplers, timeout, env)')
+    parser.add_argument('--executable', help='benchmark command (default ./benchmark_planners)')
+    parser.add_argument('--benchmarks', type=int, nargs='+', help='benchmark ids (default 0 1)')
+    parser.add_argument('--samplers', type=int, nargs='+', help='sampler ids (default 0-4)')
+    parser.add_argument('--timeout', type=float, help='seconds before a job is killed')
+    parser.add_argument('-w', '--work-dir', default='campaign', help='job directories are created here')
+    parser.add_argument('-d', '--database', default='campaign.db')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='parallel jobs (default: all cores)')
+    parser.add_argument('--force', action='store_true', help='rerun jobs that already finished')
+    args = parser.parse_args()
+
+    spec = load_spec(args.spec, executable=args.executable, benchmarks=args.benchmarks,
+                     samplers=args.samplers, timeout=args.timeout)
+    records = run_campaign(spec, args.work_dir, args.database, args.jobs, args.force)
+    if any(record['error'] for record in records):
+        sys.exit(1)
+    print(f'Campaign results are in {args.database}')
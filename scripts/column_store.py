@@ -0,0 +1,208 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from database import CACHE_DIR, ensure_indexes, stale_versions
+from results_loader import cache_key, load_progress, load_runs
+
+# Bump whenever the layout of a store changes
+STORE_VERSION = 1
+
+
+def store_dir(db_path):
+    """Store directory of the current version of a database, next to its Parquet cache."""
+    # Indexing touches the file, so do it before the cache key is taken
+    ensure_indexes(db_path)
+    db_dir = os.path.dirname(os.path.abspath(db_path))
+    db_name = os.path.splitext(os.path.basename(db_path))[0]
+    return os.path.join(db_dir, CACHE_DIR, f'{db_name}-{cache_key(db_path)}-columns')
+
+
+def _drop_stale(path):
+    # Stores of older versions of the same database are never read again
+    for old in stale_versions(path):
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def _install(tmp_path, path, key):
+    # Move a finished store into place with one rename, so readers see either
+    # no store or a complete one. A complete store of the same database
+    # version already there (a concurrent export) is kept and ours dropped;
+    # any other store at path is renamed aside first and removed after
+    try:
+        os.rename(tmp_path, path)
+        return
+    except OSError:
+        if not os.path.isdir(path):
+            raise
+    try:
+        with open(os.path.join(path, 'meta.json')) as f:
+            current = json.load(f).get('key') == key
+    except (OSError, ValueError):
+        current = False
+    if current:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        return
+    old_path = tempfile.mkdtemp(prefix=os.path.basename(path) + '.', suffix='.old',
+                                dir=os.path.dirname(os.path.abspath(path)))
+    os.rename(path, os.path.join(old_path, 'store'))
+    os.rename(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def _write_table(df, directory):
+    os.makedirs(directory)
+    columns = {}
+    for column in df.columns:
+        values = df[column]
+        if values.dtype == object or pd.api.types.is_string_dtype(values):
+            values = values.astype('category')
+        meta = {'file': f'{column}.npy'}
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            meta['categories'] = [str(category) for category in values.cat.categories]
+            array = values.cat.codes.to_numpy()
+        else:
+            array = values.to_numpy()
+        np.save(os.path.join(directory, meta['file']), np.ascontiguousarray(array))
+        meta['dtype'] = array.dtype.str
+        columns[column] = meta
+    return {'rows': len(df), 'columns': columns}
+
+
+def export_store(db_path, path=None):
+    """Write runs and progress of a database as one .npy file per column.
+
+    Runs are ordered by id and progress by (runid, time), so the progress of
+    the i-th run is rows run_offsets[i]:run_offsets[i + 1]. Categorical
+    columns are stored as integer codes, with their categories in meta.json.
+    Returns the store directory.
+    """
+    runs_df = load_runs(db_path).sort_values('id', kind='stable').reset_index(drop=True)
+    progress_df = load_progress(db_path).sort_values(['runid', 'time'], kind='stable').reset_index(drop=True)
+    # Loading may have indexed the database, so its key is only taken now
+    key = cache_key(db_path)
+    path = path or store_dir(db_path)
+
+    # Progress rows of runs missing from the runs table cannot be indexed
+    run_ids = runs_df['id'].to_numpy()
+    progress_df = progress_df[np.isin(progress_df['runid'].to_numpy(), run_ids)].reset_index(drop=True)
+    positions = np.searchsorted(run_ids, progress_df['runid'].to_numpy())
+    offsets = np.zeros(len(run_ids) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(positions, minlength=len(run_ids)), out=offsets[1:])
+
+    # Each export writes to its own directory, so concurrent exports never mix files
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=parent)
+    try:
+        meta = {
+            'version': STORE_VERSION,
+            'database': os.path.abspath(db_path),
+            'key': key,
+            'tables': {
+                'runs': _write_table(runs_df, os.path.join(tmp_path, 'runs')),
+                'progress': _write_table(progress_df, os.path.join(tmp_path, 'progress')),
+            },
+        }
+        np.save(os.path.join(tmp_path, 'run_offsets.npy'), offsets)
+        with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=1)
+        _install(tmp_path, path, key)
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    _drop_stale(path)
+    return path
+
+
+class ColumnStore:
+    """Read-only, memory-mapped view of a store written by export_store.
+
+    Nothing is read when the store is opened: every column is np.memmap'd
+    (through np.load with mmap_mode='r'), so pages are only loaded when
+    touched and processes opening the same store share them through the
+    page cache.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        if self.meta['version'] != STORE_VERSION:
+            raise ValueError(f'{path}: store version {self.meta["version"]}, expected {STORE_VERSION}')
+        self.run_offsets = np.load(os.path.join(path, 'run_offsets.npy'), mmap_mode='r')
+        self._arrays = {}
+
+    def __len__(self):
+        return self.meta['tables']['runs']['rows']
+
+    def array(self, table, column):
+        """Memory-mapped values of one column (category codes for categorical columns)."""
+        key = (table, column)
+        if key not in self._arrays:
+            meta = self.meta['tables'][table]['columns'][column]
+            self._arrays[key] = np.load(os.path.join(self.path, table, meta['file']), mmap_mode='r')
+        return self._arrays[key]
+
+    def columns(self, table):
+        return list(self.meta['tables'][table]['columns'])
+
+    def _series(self, table, column, start=None, stop=None):
+        values = self.array(table, column)[start:stop]
+        categories = self.meta['tables'][table]['columns'][column].get('categories')
+        if categories is not None:
+            return pd.Categorical.from_codes(values, categories)
+        return values
+
+    def frame(self, table, columns=None, start=None, stop=None):
+        """DataFrame over rows start:stop of a table, backed by the mapped columns (not copied)."""
+        columns = columns or self.columns(table)
+        return pd.DataFrame({column: self._series(table, column, start, stop) for column in columns}, copy=False)
+
+    def run_rows(self, position):
+        """Progress row range of the run at this position in the runs table: O(1)."""
+        return int(self.run_offsets[position]), int(self.run_offsets[position + 1])
+
+    def run_progress(self, position, columns=None):
+        """Progress samples of one run as a DataFrame of views into the store."""
+        start, stop = self.run_rows(position)
+        return self.frame('progress', columns, start, stop)
+
+    def run_position(self, run_id):
+        """Position of a run id in the runs table (ids are sorted)."""
+        ids = self.array('runs', 'id')
+        position = int(np.searchsorted(ids, run_id))
+        if position == len(ids) or ids[position] != run_id:
+            raise KeyError(f'No run with id {run_id}')
+        return position
+
+
+def open_store(db_path):
+    """ColumnStore of the current version of a database, exporting it first if needed."""
+    path = store_dir(db_path)
+    if not os.path.exists(os.path.join(path, 'meta.json')):
+        print(f'Exporting {db_path} to column store {path}...')
+        export_store(db_path, path)
+    return ColumnStore(path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export runs and progress to memory-mappable column stores.')
+    parser.add_argument('databases', nargs='+')
+    args = parser.parse_args()
+
+    for db_path in args.databases:
+        start = time.perf_counter()
+        path = export_store(db_path)
+        exported = time.perf_counter() - start
+        start = time.perf_counter()
+        store = ColumnStore(path)
+        progress = store.frame('progress')
+        opened = time.perf_counter() - start
+        print(f'{db_path}: {len(store)} runs, {len(progress)} progress rows in {path} '
+              f'(exported in {exported:.2f}s, reopened in {opened * 1000:.1f} ms)')
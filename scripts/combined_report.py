@@ -0,0 +1,81 @@
+import argparse
+import glob
+
+import pandas as pd
+from boxplots import render_box_plots
+from comparison import percentage_change_long
+from excel_report import ExcelReport
+from results_loader import load_databases, load_experiments, source_labels
+from summary_stats import grouped_statistics, statistic_table
+
+parser = argparse.ArgumentParser(description='One summary report over several benchmark databases.')
+parser.add_argument('databases', nargs='*', help='benchmark databases (default: mydatabase_*.db)')
+parser.add_argument('-o', '--output', default='combined_summary.xlsx', help='workbook (default: combined_summary.xlsx)')
+parser.add_argument('--no-plots', action='store_true', help='skip the box plots')
+args = parser.parse_args()
+
+db_paths = args.databases or sorted(glob.glob('mydatabase_*.db'))
+if not db_paths:
+    parser.error('no databases given and none match mydatabase_*.db')
+
+# Load every database concurrently; rows are tagged with their source file
+print(f'Loading {len(db_paths)} database(s)...')
+df, planner_configs = load_databases(db_paths)
+
+# Sampler facet: the sampler_id experiment parameter, or the source file for
+# databases recorded without it
+sampler = df['sampler_id'].astype('Int64').astype(str)
+df['sampler'] = sampler.where(df['sampler_id'].notna(), df['source'])
+
+# Define performance measure columns
+performance_columns = [
+    'approximate_solution', 'best_cost', 'correct_solution', 'correct_solution_strict',
+    'graph_motions', 'graph_states', 'iterations', 'memory', 'simplification_time',
+    'simplified_correct_solution', 'simplified_correct_solution_strict',
+    'simplified_solution_clearance', 'simplified_solution_length',
+    'simplified_solution_segments', 'simplified_solution_smoothness',
+    'solution_clearance', 'solution_difference', 'solution_length',
+    'solution_segments', 'solution_smoothness', 'solved', 'status', 'time',
+    'valid_segment_fraction'
+]
+group_keys = ['sampler', 'experiment', 'name']
+
+with ExcelReport(args.output) as workbook:
+
+    # Where every row came from
+    sources = []
+    for db_path, label in zip(db_paths, source_labels(db_paths)):
+        experiments = load_experiments(db_path)
+        sources.append({'source': label, 'database': db_path,
+                        'experiments': ', '.join(experiments['name'].astype(str)),
+                        'runs': int((df['source'] == label).sum())})
+    workbook.write(pd.DataFrame(sources), 'Sources')
+
+    # Each distinct planner configuration once, with the files it appears in
+    workbook.write(planner_configs, 'Planner Configs')
+
+    # Statistics per sampler, experiment and planner in one grouped pass
+    stats_df = grouped_statistics(df, performance_columns, keys=group_keys)
+    workbook.write(stats_df.reset_index(), 'Performance Statistics')
+
+    avg_performance_df = statistic_table(stats_df, 'mean')
+    workbook.write(avg_performance_df, 'Performance Averages', index=True)
+
+    # Planners are compared within each (sampler, experiment) facet, never across experiments
+    changes = []
+    for (sampler, experiment), group in df.groupby(['sampler', 'experiment'], sort=True, dropna=False,
+                                                    observed=True):
+        table = statistic_table(grouped_statistics(group, performance_columns, keys=['name']))
+        changes.append(percentage_change_long(table).assign(sampler=sampler, experiment=experiment))
+    percent_change_df = pd.concat(changes, ignore_index=True)
+    percent_change_df.insert(0, 'experiment', percent_change_df.pop('experiment'))
+    percent_change_df.insert(0, 'sampler', percent_change_df.pop('sampler'))
+    workbook.write(percent_change_df, 'Percentage Changes')
+
+print(f'Combined report for {len(db_paths)} database(s) exported to {args.output}')
+
+if not args.no_plots:
+    # One set of box plots per sampler
+    pdf_filename = 'combined_box_plots.pdf'
+    render_box_plots(df, performance_columns, pdf_filename, facets=['sampler', 'experiment'])
+    print(f'Box plots saved to {pdf_filename}')
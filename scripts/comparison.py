@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from instrument import traced
+from summary_stats import FACET_KEYS, statistic_table
+
+
+def percentage_change_tensor(table):
+    """All-pairs percentage change of a group x metric table.
+
+    Returns an array of shape (groups, groups, metrics) where
+    [i, j, m] = (table[j, m] - table[i, m]) / table[i, m] * 100,
+    computed with a single broadcast. Division by zero yields inf/NaN.
+    """
+    values = table.to_numpy(dtype='float64')
+    baseline = values[:, np.newaxis, :]
+    compared = values[np.newaxis, :, :]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (compared - baseline) / baseline * 100
+
+
+@traced()
+def percentage_change_long(table, all_pairs=False):
+    """Tidy percentage-change table with one row per (baseline, compared, metric).
+
+    By default each unordered pair appears once (baseline listed first in the
+    table); all_pairs=True also includes the reversed direction.
+    """
+    change = percentage_change_tensor(table)
+    n_groups, n_metrics = table.shape
+    if all_pairs:
+        first, second = np.nonzero(~np.eye(n_groups, dtype=bool))
+    else:
+        first, second = np.triu_indices(n_groups, k=1)
+
+    values = table.to_numpy(dtype='float64')
+    n_pairs = len(first)
+    metric_idx = np.tile(np.arange(n_metrics), n_pairs)
+    first_idx = np.repeat(first, n_metrics)
+    second_idx = np.repeat(second, n_metrics)
+
+    return pd.DataFrame({
+        'baseline': table.index.to_numpy()[first_idx],
+        'compared': table.index.to_numpy()[second_idx],
+        'metric': table.columns.to_numpy()[metric_idx],
+        'baseline_value': values[first_idx, metric_idx],
+        'compared_value': values[second_idx, metric_idx],
+        'percentage_change': change[first_idx, second_idx, metric_idx],
+    })
+
+
+@traced()
+def facet_percentage_changes(stats, statistic='mean', facets=FACET_KEYS):
+    """percentage_change_long of one statistic within each facet of a grouped_statistics table.
+
+    Planners are only compared with the planners of the same facet (by
+    default the same sampler_id and experiment), and the facet columns lead
+    the returned table. Facets missing from the index are ignored.
+    """
+    facets = [facet for facet in facets if facet in stats.index.names]
+    if not facets:
+        return percentage_change_long(statistic_table(stats, statistic))
+    changes = []
+    for key, facet_stats in stats.groupby(level=facets, sort=True, dropna=False):
+        table = statistic_table(facet_stats.droplevel(facets), statistic)
+        changes.append(percentage_change_long(table).assign(**dict(zip(facets, key))))
+    changes = pd.concat(changes, ignore_index=True)
+    return changes[facets + [column for column in changes.columns if column not in facets]]
@@ -0,0 +1,192 @@
+import argparse
+import re
+
+import pandas as pd
+
+from instrument import traced
+
+NUMBER = r'[-+]?(?:\d+(?:\.\d*)?(?:[eE][-+]?\d+)?|inf|nan)'
+
+# (trigger substring, pattern) per console message. The cheap substring test
+# skips the regex for the many lines that carry nothing of interest.
+PATTERNS = {
+    'benchmark': ('Beginning benchmark', re.compile(r'Beginning benchmark(?: (\S+))?')),
+    'experiment': ('Running experiment', re.compile(r'Running experiment (.+?)\.?\s*$')),
+    'run': ('Preparing for run', re.compile(r'Preparing for run (\d+) of (\S+)')),
+    'k_nearest': ('Initial k-nearest', re.compile(rf'Initial k-nearest value of ({NUMBER})')),
+    'initial_solution': ('Found an initial solution', re.compile(
+        rf'Found an initial solution with a cost of ({NUMBER}) in (\d+) iterations \((\d+) vertices in the graph\)')),
+    'tree': ('rewire options', re.compile(
+        rf'Created (\d+) new states\. Checked (\d+) rewire options\. (\d+) goal states in tree\. '
+        rf'Final solution cost ({NUMBER})')),
+    'simplification': ('Path simplification took', re.compile(
+        rf'Path simplification took ({NUMBER}) seconds and changed from (\d+) to (\d+) states')),
+    'path_fix': ('slightly touching', re.compile(r'solution path was slightly touching')),
+}
+
+# Fields each pattern fills in, in group order
+FIELDS = {
+    'k_nearest': [('k_nearest', int)],
+    'initial_solution': [('initial_cost', float), ('initial_iterations', int), ('initial_vertices', int)],
+    'tree': [('new_states', int), ('rewire_checks', int), ('goal_states', int), ('final_cost', float)],
+    'simplification': [('simplification_seconds', float), ('states_before_simplification', int),
+                       ('states_after_simplification', int)],
+}
+
+# Per-run metrics mined from the console, ready for summary_stats.grouped_statistics
+CONSOLE_COLUMNS = [
+    'k_nearest', 'initial_cost', 'initial_iterations', 'initial_vertices', 'new_states',
+    'rewire_checks', 'goal_states', 'final_cost', 'simplification_seconds',
+    'states_before_simplification', 'states_after_simplification', 'path_fixes',
+    'rewire_checks_per_state',
+]
+
+
+def iter_lines(path):
+    """Lines of a console capture, streamed so memory does not grow with file size."""
+    with open(path, 'r', errors='replace', buffering=1 << 20) as f:
+        yield from f
+
+
+def parse_console(path):
+    """Yield one dict per benchmark run found in a .console capture.
+
+    Runs are identified by the benchmark ordinal in the file (each
+    'Beginning benchmark' starts a new one), the planner name and the run
+    index of the 'Preparing for run K of <planner>' line. A message is
+    attributed to the run announced most recently before it. The experiment
+    name is taken from the benchmark header ('Running experiment <name>.'
+    or 'Beginning benchmark <name>') when the console prints it.
+    """
+    benchmark = -1
+    experiment = None
+    run = None
+    for line in iter_lines(path):
+        for kind, (trigger, pattern) in PATTERNS.items():
+            if trigger not in line:
+                continue
+            match = pattern.search(line)
+            if match is None:
+                continue
+            if kind == 'benchmark':
+                if run is not None:
+                    yield run
+                    run = None
+                benchmark += 1
+                experiment = match.group(1)
+            elif kind == 'experiment':
+                experiment = match.group(1)
+            elif kind == 'run':
+                if run is not None:
+                    yield run
+                run = {'benchmark': max(benchmark, 0), 'experiment': experiment, 'planner': match.group(2),
+                       'run_index': int(match.group(1)), 'path_fixes': 0}
+            elif run is None:
+                pass
+            elif kind == 'path_fix':
+                run['path_fixes'] += 1
+            elif FIELDS[kind][0][0] not in run:
+                # Only the first occurrence counts (e.g. the initial solution)
+                for (field, convert), value in zip(FIELDS[kind], match.groups()):
+                    run[field] = convert(float(value)) if convert is int else convert(value)
+            break
+    if run is not None:
+        yield run
+
+
+@traced()
+def console_runs(paths):
+    """Per-run table mined from one or more console captures.
+
+    Benchmarks are numbered across the files in the order given, so they
+    line up with the experiments of a database ingested in the same order.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    frames = []
+    offset = 0
+    for path in paths:
+        df = pd.DataFrame.from_records(parse_console(path))
+        if df.empty:
+            continue
+        df['benchmark'] += offset
+        offset = df['benchmark'].max() + 1
+        df.insert(0, 'source', path)
+        frames.append(df)
+
+    columns = ['source', 'benchmark', 'experiment', 'planner', 'run_index'] + CONSOLE_COLUMNS
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    df = pd.concat(frames, ignore_index=True).reindex(columns=columns)
+    df['name'] = df['planner'].str.replace('geometric_', '', regex=False)
+    df['rewire_checks_per_state'] = df['rewire_checks'] / df['new_states']
+    return df
+
+
+def _experiment_ids(runs_df, console_df):
+    # Experiment id of every console benchmark, in benchmark order. The
+    # 'all_experiments' aggregate of OMPL databases never has console output
+    experiments = (runs_df[['experimentid', 'experiment']].drop_duplicates('experimentid')
+                   .sort_values('experimentid'))
+    experiments = experiments[experiments['experiment'].astype(object) != 'all_experiments']
+    benchmarks = console_df.drop_duplicates('benchmark').sort_values('benchmark')
+    if len(benchmarks) and benchmarks['experiment'].notna().all():
+        # The k-th benchmark named X is the k-th experiment named X
+        experiments = experiments.astype({'experiment': object})
+        ranks = experiments.groupby('experiment').cumcount()
+        ids = dict(zip(zip(experiments['experiment'], ranks), experiments['experimentid']))
+        keys = zip(benchmarks['experiment'], benchmarks.groupby('experiment').cumcount())
+        return [ids.get(key) for key in keys]
+    return experiments['experimentid'].tolist()
+
+
+def merge_console_metrics(runs_df, console_df, experiment_ids=None):
+    """Add the console metrics to the runs table (as from results_loader.load_runs).
+
+    A run's index is its position among the runs of the same planner in the
+    same experiment. Console benchmark k maps to experiment_ids[k]. By
+    default benchmarks are matched by the experiment name of their console
+    header, or, for consoles that do not print it, by order with the
+    experiments of runs_df in ascending id order ('all_experiments'
+    excluded). Runs without console data keep NaN metrics.
+    """
+    runs_df = runs_df.copy()
+    runs_df['run_index'] = runs_df.sort_values('id').groupby(['experimentid', 'plannerid']).cumcount()
+
+    if experiment_ids is None:
+        experiment_ids = _experiment_ids(runs_df, console_df)
+    n_benchmarks = console_df['benchmark'].nunique()
+    if n_benchmarks > len(experiment_ids):
+        raise ValueError(f'Console has {n_benchmarks} benchmarks but only {len(experiment_ids)} '
+                         'experiments to align them with; pass experiment_ids')
+    unmatched = [k for k, experiment_id in enumerate(experiment_ids[:n_benchmarks]) if experiment_id is None]
+    if unmatched:
+        print(f'No experiment matches console benchmark(s) {unmatched}; their metrics are left out')
+
+    console = console_df.assign(experimentid=console_df['benchmark'].map(dict(enumerate(experiment_ids))))
+    metrics = [column for column in CONSOLE_COLUMNS if column not in runs_df.columns]
+    return runs_df.merge(console[['experimentid', 'name', 'run_index'] + metrics],
+                         on=['experimentid', 'name', 'run_index'], how='left')
+
+
+if __name__ == '__main__':
+    from results_loader import load_runs
+    from summary_stats import grouped_statistics
+
+    parser = argparse.ArgumentParser(description='Mine per-run metrics from OMPL benchmark console captures.')
+    parser.add_argument('consoles', nargs='+', help='.console files')
+    parser.add_argument('-d', '--database', help='align the runs with this benchmark database')
+    parser.add_argument('-o', '--output', default='console_runs.csv', help='per-run CSV (default: console_runs.csv)')
+    args = parser.parse_args()
+
+    df = console_runs(args.consoles)
+    print(f'Found {len(df)} runs in {len(args.consoles)} console file(s)')
+    keys = ['name']
+    if args.database:
+        df = merge_console_metrics(load_runs(args.database), df)
+        keys = ['name', 'sampler_id', 'experiment']
+    df.to_csv(args.output, index=False)
+    print(f'Per-run console metrics saved to {args.output}')
+
+    stats = grouped_statistics(df, CONSOLE_COLUMNS, keys=keys)
+    print(stats[['runs', 'mean', 'median']].to_string())
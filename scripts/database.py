@@ -0,0 +1,128 @@
+import json
+import os
+import re
+import sqlite3
+import time
+from urllib.request import pathname2url
+
+# Per-database cache directory, created next to each database file
+CACHE_DIR = '.results_cache'
+
+# Cache entries are named <db_name>-<key>-<suffix>, key being 16 hex digits
+# of results_loader.cache_key
+CACHE_KEY_PATTERN = '[0-9a-f]{16}'
+
+# Indexes the results_loader joins rely on, keyed by (table, leading column).
+# OMPL's progress primary key (runid, time) already satisfies the progress entry.
+INDEXES = {
+    ('runs', 'plannerid'): 'CREATE INDEX IF NOT EXISTS idx_runs_plannerid ON runs (plannerid, id, experimentid)',
+    ('progress', 'runid'): 'CREATE INDEX IF NOT EXISTS idx_progress_runid ON progress (runid, time)',
+}
+
+# Timed before and after creating indexes
+INDEX_PROBE_QUERY = """
+    SELECT plannerConfigs.id, COUNT(*), MAX(progress.time)
+    FROM plannerConfigs
+    INNER JOIN runs ON plannerConfigs.id = runs.plannerid
+    INNER JOIN progress ON runs.id = progress.runid
+    GROUP BY plannerConfigs.id
+"""
+
+# Read-only analysis connections map up to 1 GiB and keep a 256 MiB page cache
+MMAP_SIZE = 1 << 30
+CACHE_SIZE_KIB = 256 * 1024
+
+
+def _leading_index_columns(conn, table):
+    columns = set()
+    for index in conn.execute(f'PRAGMA index_list({table})').fetchall():
+        info = conn.execute(f'PRAGMA index_info("{index[1]}")').fetchall()
+        if info:
+            columns.add(min(info)[2])
+    return columns
+
+
+def _time_query(conn, query):
+    start = time.perf_counter()
+    conn.execute(query).fetchall()
+    return time.perf_counter() - start
+
+
+_checked_databases = set()
+
+
+def ensure_indexes(db_path):
+    """Create the join indexes (and ANALYZE) if the database lacks them.
+
+    Runs once per database and process. The probe join is timed before and
+    after, and the timings are appended to index_timings.jsonl in the cache
+    directory. Returns the timing record, or None if nothing had to be done.
+    """
+    db_path = os.path.abspath(db_path)
+    if db_path in _checked_databases:
+        return None
+    _checked_databases.add(db_path)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        missing = [
+            statement for (table, column), statement in INDEXES.items()
+            if table in tables and column not in _leading_index_columns(conn, table)
+        ]
+        if not missing:
+            return None
+
+        print(f'Creating {len(missing)} missing index(es) on {db_path}...')
+        before = _time_query(conn, INDEX_PROBE_QUERY)
+        for statement in missing:
+            conn.execute(statement)
+        conn.execute('ANALYZE')
+        conn.commit()
+        after = _time_query(conn, INDEX_PROBE_QUERY)
+    except sqlite3.OperationalError as e:
+        # Read-only file or locked database: analyses still work, just slower
+        print(f'Could not index {db_path}: {e}')
+        return None
+    finally:
+        conn.close()
+
+    record = {'database': db_path, 'indexes': missing,
+              'probe_seconds_before': round(before, 6), 'probe_seconds_after': round(after, 6)}
+    print(f'Join probe took {before:.3f}s before indexing and {after:.3f}s after')
+    cache_dir = os.path.join(os.path.dirname(db_path), CACHE_DIR)
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(os.path.join(cache_dir, 'index_timings.jsonl'), 'a') as f:
+        f.write(json.dumps(record) + '\n')
+    return record
+
+
+def stale_versions(cache_path):
+    """Other versions of a cache entry: same database name and suffix, another key.
+
+    Names are matched exactly, so a database whose name merely starts with
+    this one's (a.db and a-b.db) never loses its entries.
+    """
+    directory, name = os.path.split(cache_path)
+    match = re.fullmatch(f'(.+)-{CACHE_KEY_PATTERN}-([^-]+)', name)
+    if match is None:
+        return []
+    db_name, suffix = match.groups()
+    pattern = re.compile(f'{re.escape(db_name)}-{CACHE_KEY_PATTERN}-{re.escape(suffix)}')
+    return [os.path.join(directory, entry) for entry in sorted(os.listdir(directory))
+            if entry != name and pattern.fullmatch(entry)]
+
+
+def connect(db_path):
+    """Read-only connection tuned for analysis passes (mmap and a large page cache).
+
+    Missing join indexes are created first (see ensure_indexes).
+    """
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f'Database not found: {db_path}')
+    ensure_indexes(db_path)
+    uri = f'file:{pathname2url(os.path.abspath(db_path))}?mode=ro'
+    conn = sqlite3.connect(uri, uri=True)
+    conn.execute(f'PRAGMA mmap_size = {MMAP_SIZE}')
+    conn.execute(f'PRAGMA cache_size = -{CACHE_SIZE_KIB}')
+    return conn
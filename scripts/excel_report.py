@@ -0,0 +1,120 @@
+import os
+import re
+
+from export_writer import start_export
+from instrument import stage
+
+# Rows per worksheet in .xlsx files (including the header row)
+EXCEL_MAX_ROWS = 1_048_576
+
+# Raw tables needing more sheets than this go to a Parquet side file instead
+MAX_RAW_SHEETS = 4
+
+# Rows converted to Python values at a time while streaming a sheet
+CHUNK_ROWS = 50_000
+
+
+def _cell_values(df):
+    # Plain Python values, with blanks for NaN/None (xlsxwriter cannot store NaN).
+    # float32 columns go through their shortest repr, so 0.1 stays 0.1 in Excel
+    # instead of becoming 0.10000000149011612
+    widened = {column: df[column].to_numpy().astype(str).astype('float64')
+               for column in df.columns if df[column].dtype == 'float32'}
+    if widened:
+        df = df.assign(**widened)
+    values = df.astype(object)
+    return values.where(values.notna(), None).itertuples(index=False, name=None)
+
+
+class ExcelReport:
+    """Workbook written in xlsxwriter's constant-memory mode.
+
+    Each row is flushed to disk as soon as it is written, so memory does not
+    grow with the size of a sheet. Summary tables added with write() come
+    first in the workbook; raw tables added with write_raw() are written
+    last, split over numbered sheets at Excel's row limit, or moved to a
+    Parquet file next to the workbook (with a link sheet) when they would
+    need more than max_raw_sheets sheets. If the with block fails, no raw
+    tables are written and the partial workbook is deleted.
+    """
+
+    def __init__(self, path, max_rows=EXCEL_MAX_ROWS, max_raw_sheets=MAX_RAW_SHEETS):
+        import xlsxwriter
+
+        self.path = path
+        self.max_rows = max_rows
+        self.max_raw_sheets = max_raw_sheets
+        # Infinite values (e.g. percentage change from 0) become Excel errors
+        self.workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'nan_inf_to_errors': True})
+        self.header_format = self.workbook.add_format({'bold': True})
+        self._raw_tables = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+            return
+        # Never leave a workbook behind that looks complete but is not
+        self._raw_tables = []
+        self.workbook.close()
+        os.remove(self.path)
+        print(f'Report failed, removed the partial workbook {self.path}')
+
+    def _write_sheet(self, sheet_name, df):
+        with stage(f'excel sheet {sheet_name}', len(df)) as current:
+            sheet = self.workbook.add_worksheet(sheet_name)
+            sheet.write_row(0, 0, [str(column) for column in df.columns], self.header_format)
+            row = 1
+            for start in range(0, len(df), CHUNK_ROWS):
+                for values in _cell_values(df.iloc[start:start + CHUNK_ROWS]):
+                    sheet.write_row(row, 0, values)
+                    row += 1
+            current.rows_out = row - 1
+
+    def write(self, df, sheet_name, index=False):
+        """Write a (summary) table to a new sheet right away."""
+        if index:
+            df = df.reset_index()
+            if df.columns[0] == 'index':
+                df = df.rename(columns={'index': ''})
+        self._write_sheet(sheet_name, df)
+
+    def write_raw(self, df, sheet_name='Raw Data'):
+        """Queue a raw table; it is written after every summary sheet."""
+        self._raw_tables.append((sheet_name, df))
+
+    def _side_file(self, sheet_name):
+        stem = os.path.splitext(self.path)[0]
+        slug = re.sub(r'\W+', '_', sheet_name).strip('_').lower()
+        return f'{stem}_{slug}'
+
+    def _flush_raw(self):
+        rows_per_sheet = self.max_rows - 1
+        jobs = []
+        for sheet_name, df in self._raw_tables:
+            n_sheets = max(1, -(-len(df) // rows_per_sheet))
+            if n_sheets <= self.max_raw_sheets:
+                for part in range(n_sheets):
+                    name = sheet_name if part == 0 else f'{sheet_name} {part + 1}'
+                    self._write_sheet(name, df.iloc[part * rows_per_sheet:(part + 1) * rows_per_sheet])
+                if n_sheets > 1:
+                    print(f'{sheet_name}: {len(df)} rows split over {n_sheets} sheets')
+                continue
+
+            base_path = self._side_file(sheet_name)
+            jobs.append(start_export(df, base_path, ['parquet']))
+            parquet_path = f'{base_path}.parquet'
+            sheet = self.workbook.add_worksheet(sheet_name)
+            sheet.write(0, 0, f'{len(df)} rows exceed {self.max_raw_sheets} sheets; data saved to:', self.header_format)
+            sheet.write_url(1, 0, f'external:{os.path.basename(parquet_path)}', string=parquet_path)
+            print(f'{sheet_name}: {len(df)} rows written to {parquet_path}')
+        for job in jobs:
+            job.wait()
+        self._raw_tables = []
+
+    def close(self):
+        self._flush_raw()
+        with stage('excel close'):
+            self.workbook.close()
@@ -0,0 +1,85 @@
+import argparse
+import os
+import threading
+
+EXPORT_FORMATS = ('csv', 'parquet')
+
+
+def requested_formats(argv=None):
+    """Export formats asked for on the command line (--export csv --export parquet)."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--export', action='append', default=[])
+    args, _ = parser.parse_known_args(argv)
+    formats = []
+    for value in args.export:
+        for fmt in value.split(','):
+            fmt = fmt.strip().lower()
+            if fmt not in EXPORT_FORMATS:
+                raise ValueError(f'Unknown export format {fmt!r}, expected one of {EXPORT_FORMATS}')
+            if fmt not in formats:
+                formats.append(fmt)
+    return formats
+
+
+class ExportJob(threading.Thread):
+    """Streams a DataFrame to CSV/Parquet in row chunks on a background thread.
+
+    The thread works on a snapshot taken when the job is created, so the
+    caller may go on renaming or adding columns of its own frame.
+    """
+
+    def __init__(self, df, base_path, formats, chunk_rows=100_000):
+        super().__init__(name=f'export-{os.path.basename(base_path)}')
+        # Shares the column data (copy-on-write) but has its own column index
+        self.df = df.copy(deep=False)
+        self.df.columns = df.columns.copy()
+        self.base_path = base_path
+        self.formats = list(formats)
+        self.chunk_rows = chunk_rows
+        self.error = None
+
+    def _chunks(self):
+        for start in range(0, len(self.df), self.chunk_rows):
+            yield self.df.iloc[start:start + self.chunk_rows]
+
+    def _write_csv(self, path):
+        with open(path, 'w', newline='') as f:
+            header = True
+            for chunk in self._chunks():
+                chunk.to_csv(f, index=False, header=header)
+                header = False
+            if header:
+                self.df.head(0).to_csv(f, index=False)
+
+    def _write_parquet(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.Schema.from_pandas(self.df, preserve_index=False)
+        with pq.ParquetWriter(path, schema) as writer:
+            for chunk in self._chunks():
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+    def run(self):
+        try:
+            for fmt in self.formats:
+                path = f'{self.base_path}.{fmt}'
+                getattr(self, f'_write_{fmt}')(path)
+                print(f'Exported {len(self.df)} rows to {path}')
+        except Exception as e:
+            self.error = e
+
+    def wait(self):
+        """Block until the export has finished, re-raising any writer error."""
+        if self.ident is not None:
+            self.join()
+        if self.error is not None:
+            raise self.error
+
+
+def start_export(df, base_path, formats):
+    """Start exporting df to base_path.<fmt> for each format; returns the running job."""
+    job = ExportJob(df, base_path, formats)
+    if job.formats:
+        job.start()
+    return job
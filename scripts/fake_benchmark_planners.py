@@ -0,0 +1,101 @@
+"""Stand-in for benchmark_planners that writes fake OMPL logs instantly.
+
+Takes the same arguments as SE3RigidBodyPlanningBenchmark.cpp: argv[1]
+selects the benchmark (cubicles or Twistycool) and argv[2] the valid state
+sampler (0-4; all of them, one log each, if omitted). Runs per planner and
+progress samples per run come from FAKE_BENCHMARK_RUNS and
+FAKE_BENCHMARK_SAMPLES, FAKE_BENCHMARK_DELAY adds seconds of sleep per log,
+and FAKE_BENCHMARK_FAIL=<sampler id> makes that sampler crash.
+"""
+import datetime
+import os
+import random
+import socket
+import sys
+import time
+
+from synthetic_db import PLANNERS, RUN_PROPERTIES, STATUS_VALUES
+
+# name, time limit, run count of benchmark0 and benchmark1
+BENCHMARKS = [('cubicles', 100.0, 10), ('Twistycool', 60.0, 10)]
+
+SETTINGS = [('delay_collision_checking', 'BOOLEAN', '1'), ('goal_bias', 'REAL', '0.05'),
+            ('range', 'REAL', '0'), ('rewire_factor', 'REAL', '1.1')]
+
+
+def _run_values(rnd, time_limit):
+    solved = rnd.random() < 0.9
+    values = {
+        'approximate_solution': int(not solved), 'best_cost': 1800 + rnd.random() * 200,
+        'solved': int(solved), 'status': STATUS_VALUES.index('Exact solution' if solved else 'Timeout'),
+        'time': time_limit,
+    }
+    line = []
+    for name, sql_type in RUN_PROPERTIES:
+        if name in values:
+            value = values[name]
+        elif sql_type in ('BOOLEAN', 'ENUM'):
+            value = int(solved)
+        elif sql_type == 'INTEGER':
+            value = rnd.randint(10, 50_000)
+        else:
+            value = rnd.random() * 100
+        line.append(repr(value) if isinstance(value, float) else str(value))
+    return line
+
+
+def _progress_line(rnd, time_limit, samples):
+    entries = []
+    cost = 2500.0
+    for k in range(samples):
+        cost -= rnd.random() * 20
+        best = 'nan' if k < 2 else repr(cost)
+        entries.append(f'{time_limit * (k + 1) / samples:.6f},{best},{k * 100},;')
+    return ''.join(entries)
+
+
+def write_log(benchmark_id, sampler_id, runs, samples, seed=None):
+    name, time_limit, _ = BENCHMARKS[benchmark_id]
+    rnd = random.Random(seed if seed is not None else benchmark_id * 10 + sampler_id)
+    host = socket.gethostname()
+    start = datetime.datetime.now()
+    path = f'{name}_{host}_{start.strftime("%Y-%m-%d %H:%M:%S.%f")}_{sampler_id}.log'
+
+    lines = [
+        'OMPL version 1.6.0', f'Experiment {name}', '1 experiment properties', f'sampler_id INTEGER={sampler_id}',
+        f'Running on {host}', f'Starting at {start.isoformat()}',
+        '<<<|', 'Fake SE3 setup', '|>>>', '<<<|', 'fake CPU', '|>>>',
+        f'{rnd.randint(1, 2**31)} is the random seed', f'{time_limit} seconds per run', '10000 MB per run',
+        f'{runs} runs per planner', f'{time_limit * runs * len(PLANNERS)} seconds spent to collect the data',
+        '1 enum types', 'status|' + '|'.join(STATUS_VALUES),
+        f'{len(PLANNERS)} planners',
+    ]
+    for planner in PLANNERS:
+        lines.append(planner)
+        lines.append(f'{len(SETTINGS)} common properties')
+        lines += [f'{key} {sql_type} = {value}' for key, sql_type, value in SETTINGS]
+        lines.append(f'{len(RUN_PROPERTIES)} properties for each run')
+        lines += [f'{column.replace("_", " ")} {sql_type}' for column, sql_type in RUN_PROPERTIES]
+        lines.append(f'{runs} runs')
+        lines += ['; '.join(_run_values(rnd, time_limit)) + '; ' for _ in range(runs)]
+        lines += ['3 progress properties for each run', 'time REAL', 'best cost REAL', 'iterations INTEGER',
+                  f'{runs} runs']
+        lines += [_progress_line(rnd, time_limit, samples) for _ in range(runs)]
+        lines.append('.')
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    return path
+
+
+if __name__ == '__main__':
+    benchmark_id = (ord(sys.argv[1][0]) - ord('0')) % 2 if len(sys.argv) > 1 else 0
+    sampler_ids = [(ord(sys.argv[2][0]) - ord('0')) % 5] if len(sys.argv) > 2 else range(5)
+    runs = int(os.environ.get('FAKE_BENCHMARK_RUNS', BENCHMARKS[benchmark_id][2]))
+    samples = int(os.environ.get('FAKE_BENCHMARK_SAMPLES', 20))
+    for sampler_id in sampler_ids:
+        print(f'Beginning benchmark {BENCHMARKS[benchmark_id][0]} with sampler {sampler_id}')
+        time.sleep(float(os.environ.get('FAKE_BENCHMARK_DELAY', 0)))
+        if os.environ.get('FAKE_BENCHMARK_FAIL') == str(sampler_id):
+            print(f'Sampler {sampler_id} crashed', file=sys.stderr)
+            sys.exit(1)
+        print(f'Saved {write_log(benchmark_id, sampler_id, runs, samples)}')
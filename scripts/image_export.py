@@ -0,0 +1,88 @@
+import plotly.io as pio
+
+from instrument import traced
+
+
+def _has_batch_export():
+    # plotly >= 6.1 with kaleido >= 1.0 can write many figures in one call
+    return hasattr(pio, 'write_images')
+
+
+class ImageExportSession:
+    """Batches Plotly static image exports through one long-lived exporter.
+
+    Figures are queued with add() and written in a single batch on flush(),
+    close() or the end of a `with` block, so exporter startup is paid once
+    per report rather than once per file. Each figure can fan out to several
+    formats, e.g. add(fig, 'best_cost_over_time', ('png', 'pdf')).
+    """
+
+    def __init__(self):
+        self._figures = []
+        self._paths = []
+        self._scales = []
+        self._started_server = False
+
+    def open(self):
+        """Start the export server (kaleido >= 1.0); returns the session."""
+        try:
+            import kaleido
+        except ImportError:
+            kaleido = None
+        if kaleido is not None and hasattr(kaleido, 'start_sync_server'):
+            kaleido.start_sync_server(silence_warnings=True)
+            self._started_server = True
+        return self
+
+    def close(self, flush=True):
+        """Write any queued figures and shut the export server down."""
+        try:
+            if flush:
+                self.flush()
+        finally:
+            if self._started_server:
+                import kaleido
+                kaleido.stop_sync_server(silence_warnings=True)
+                self._started_server = False
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(flush=exc_type is None)
+        return False
+
+    def add(self, fig, base_path, formats=('png',), scale=None):
+        """Queue fig for export to base_path.<fmt> for every format; returns the paths."""
+        paths = [f'{base_path}.{fmt}' for fmt in formats]
+        for path in paths:
+            self._figures.append(fig)
+            self._paths.append(path)
+            self._scales.append(scale)
+        return paths
+
+    def flush(self):
+        """Write every queued figure and return the paths written."""
+        figures, paths, scales = self._figures, self._paths, self._scales
+        self._figures, self._paths, self._scales = [], [], []
+        if not figures:
+            return []
+
+        if _has_batch_export():
+            pio.write_images(figures, paths, scale=scales)
+        else:
+            # Older kaleido keeps its own export scope alive between calls
+            for fig, path, scale in zip(figures, paths, scales):
+                fig.write_image(path, scale=scale)
+        for path in paths:
+            print(f'Saved {path}')
+        return paths
+
+
+@traced()
+def export_figures(figures, formats=('png',), scale=None):
+    """Export (fig, base_path) pairs to every format in one batch."""
+    with ImageExportSession() as session:
+        for fig, base_path in figures:
+            session.add(fig, base_path, formats, scale)
+    return [f'{base_path}.{fmt}' for _, base_path in figures for fmt in formats]
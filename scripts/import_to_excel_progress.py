@@ -1,145 +1,53 @@
-import subprocess
-import sys
-import pandas as pd
-import sqlite3
+from comparison import percentage_change_long
+from excel_report import ExcelReport
+from export_writer import requested_formats, start_export
+from results_loader import load_progress
+from summary_stats import grouped_statistics, statistic_table
 
-# Function to install a package
-def install(package):
-    subprocess.check_call([sys.executable, '-m', 'pip', 'install', package])
+# Load results through the shared cached loader
+db_path = 'mydatabase_gaussian.db'
+df = load_progress(db_path)
 
-# Install pandas and openpyxl if not already installed
-try:
-    import pandas as pd
-    import openpyxl
-except ImportError:
-    install('pandas')
-    install('openpyxl')
-    import pandas as pd
-    import openpyxl
-
-# Connect to SQLite database
-conn = sqlite3.connect('mydatabase_gaussian.db')
-
-# Query the data
-query = 'SELECT * FROM progress'
-
-# Load data into a DataFrame
-df = pd.read_sql_query(query, conn)
-
-# Save DataFrame to CSV
-df.to_csv('your_data.csv', index=False)
-
-# Close the connection
-conn.close()
+# Export the raw table only when asked for (--export csv/parquet); runs in the background
+export_job = start_export(df, 'your_data', requested_formats())
 
 # Data Processing
 
-# Load data from CSV
-df = pd.read_csv('your_data.csv')
-
 # Print column names to verify
-print("Columns in the CSV:", df.columns.tolist())
+print("Columns:", df.columns.tolist())
 
 # Clean column names
 df.columns = df.columns.str.strip()
 
 # Print cleaned column names
-print("Cleaned Columns in the CSV:", df.columns.tolist())
+print("Cleaned columns:", df.columns.tolist())
 
-# Define the planner IDs and columns for performance measures
-planner_ids = [1, 2, 3, 4, 5]
+# Define the columns for performance measures
 performance_columns = [
     'runid', 'time', 'best_cost', 'iterations'
 ]
 
-# Create a new Excel writer object
-with pd.ExcelWriter('performance_summary.xlsx', engine='openpyxl') as writer:
+# Stream the workbook in constant memory, summary sheets first
+with ExcelReport('performance_summary.xlsx') as workbook:
     
-    # Create a sheet for the raw data
-    df.to_excel(writer, sheet_name='Raw Data', index=False)
+    # Raw data is written last, split over sheets or moved to Parquet if too large
+    workbook.write_raw(df)
     
-    # Create a DataFrame to store the average performance measures
-    avg_performance_df = pd.DataFrame()
-    
-    for planner_id in planner_ids:
-        # Filter data for the current planner
-        planner_data = df[df['plannerid'] == planner_id]
-        
-        # Calculate average for each performance measure column
-        avg_performance = planner_data[performance_columns].mean()
-        
-        # Add to the summary DataFrame
-        avg_performance_df[f'Planner {planner_id}'] = avg_performance
-    
-    # Transpose for better readability
-    avg_performance_df = avg_performance_df.T
+    # Average performance measures for every planner in one grouped pass
+    stats_df = grouped_statistics(df, performance_columns, keys=['plannerid'])
+    avg_performance_df = statistic_table(stats_df, 'mean')
+    avg_performance_df.index = 'Planner ' + avg_performance_df.index
     
     # Save the average performance measures to a new sheet
-    avg_performance_df.to_excel(writer, sheet_name='Performance Averages')
-
-    # Calculate percentage changes
-    def calculate_percentage_change(df1, df2):
-        return ((df2 - df1) / df1) * 100
-
-    # Create a DataFrame for percentage changes
-    percent_change_df = pd.DataFrame()
-
-    # Comparison: Planner 1 vs Planner 2
-    percent_change_df['Planner 1 vs Planner 2'] = calculate_percentage_change(
-        avg_performance_df.loc['Planner 1'], avg_performance_df.loc['Planner 2']
-    )
-    
-    # Comparison: Planner 1 vs Planner 3
-    percent_change_df['Planner 1 vs Planner 3'] = calculate_percentage_change(
-        avg_performance_df.loc['Planner 1'], avg_performance_df.loc['Planner 3']
-    )
-    
-    # Comparison: Planner 1 vs Planner 4
-    percent_change_df['Planner 1 vs Planner 4'] = calculate_percentage_change(
-        avg_performance_df.loc['Planner 1'], avg_performance_df.loc['Planner 4']
-    )
-
-    # Comparison: Planner 1 vs Planner 5
-    percent_change_df['Planner 1 vs Planner 5'] = calculate_percentage_change(
-        avg_performance_df.loc['Planner 1'], avg_performance_df.loc['Planner 5']
-    )
-    
-    # Comparison: Planner 2 vs Planner 3
-    percent_change_df['Planner 2 vs Planner 3'] = calculate_percentage_change(
-        avg_performance_df.loc['Planner 2'], avg_performance_df.loc['Planner 3']
-    )
-    
-    # Comparison: Planner 2 vs Planner 3
-    percent_change_df['Planner 2 vs Planner 4'] = calculate_percentage_change(
-        avg_performance_df.loc['Planner 2'], avg_performance_df.loc['Planner 4']
-    )
-    
-    # Comparison: Planner 2 vs Planner 5
-    percent_change_df['Planner 2 vs Planner 3'] = calculate_percentage_change(
-        avg_performance_df.loc['Planner 2'], avg_performance_df.loc['Planner 5']
-    )
-
-    
-    # Comparison: Planner 3 vs Planner 4
-    percent_change_df['Planner 3 vs Planner 4'] = calculate_percentage_change(
-        avg_performance_df.loc['Planner 3'], avg_performance_df.loc['Planner 4']
-    )
-
-    
-    # Comparison: Planner 3 vs Planner 5
-    percent_change_df['Planner 3 vs Planner 5'] = calculate_percentage_change(
-        avg_performance_df.loc['Planner 3'], avg_performance_df.loc['Planner 5']
-    )
-
-    
-    # Comparison: Planner 4 vs Planner 5
-    percent_change_df['Planner 4 vs Planner 5'] = calculate_percentage_change(
-        avg_performance_df.loc['Planner 4'], avg_performance_df.loc['Planner 5']
-    )
+    workbook.write(avg_performance_df, 'Performance Averages', index=True)
 
+    # Percentage change of every measure for all planner pairs, as a long table
+    percent_change_df = percentage_change_long(avg_performance_df)
 
     # Save the percentage change data to a new sheet
-    percent_change_df.to_excel(writer, sheet_name='Percentage Changes')
+    workbook.write(percent_change_df, 'Percentage Changes')
 
 print('Data, performance averages, and percentage changes have been exported to performance_summary.xlsx')
 
+# Wait for any background export to finish
+export_job.wait()
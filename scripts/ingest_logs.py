@@ -0,0 +1,378 @@
+import argparse
+import mmap
+import multiprocessing
+import os
+import queue
+import sqlite3
+
+from instrument import traced
+from parallel import pool_context
+
+# Same tables as OMPL's ompl_benchmark_statistics.py; run and progress
+# property columns are added as they appear in the logs
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS experiments
+    (id INTEGER PRIMARY KEY AUTOINCREMENT, name VARCHAR(512),
+    totaltime REAL, timelimit REAL, memorylimit REAL, runcount INTEGER,
+    version VARCHAR(128), hostname VARCHAR(1024), cpuinfo TEXT,
+    date DATETIME, seed INTEGER, setup TEXT);
+    CREATE TABLE IF NOT EXISTS plannerConfigs
+    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(512) NOT NULL, settings TEXT);
+    CREATE TABLE IF NOT EXISTS enums
+    (name VARCHAR(512), value INTEGER, description TEXT,
+    PRIMARY KEY (name, value));
+    CREATE TABLE IF NOT EXISTS runs
+    (id INTEGER PRIMARY KEY AUTOINCREMENT, experimentid INTEGER, plannerid INTEGER,
+    FOREIGN KEY (experimentid) REFERENCES experiments(id) ON DELETE CASCADE,
+    FOREIGN KEY (plannerid) REFERENCES plannerConfigs(id) ON DELETE CASCADE);
+    CREATE TABLE IF NOT EXISTS progress
+    (runid INTEGER, time REAL, PRIMARY KEY (runid, time),
+    FOREIGN KEY (runid) REFERENCES runs(id) ON DELETE CASCADE);
+"""
+
+# Values OMPL writes for missing or non-finite measurements
+INVALID_VALUES = {'', 'nan', '-nan', 'inf', '-inf'}
+
+# Page cache of the writer connection, large enough to keep the progress
+# primary-key index in memory while inserting
+CACHE_SIZE_KIB = 256 * 1024
+
+# Rows per executemany batch (and per message from a parse worker)
+BATCH_ROWS = 10_000
+
+
+class LogFormatError(ValueError):
+    pass
+
+
+class _LogReader:
+    """Line reader over a memory-mapped log file, with OMPL's optional-line lookahead."""
+
+    def __init__(self, path, mm):
+        self.path = path
+        self.mm = mm
+
+    def readline(self):
+        line = self.mm.readline()
+        if not line:
+            raise LogFormatError(f'{self.path}: unexpected end of file')
+        return line.decode('utf-8', 'replace').rstrip('\r\n')
+
+    def fields(self):
+        return self.readline().split()
+
+    def optional(self, index, expected):
+        """Field at index of the next line if its tokens match expected, else None (line kept)."""
+        pos = self.mm.tell()
+        fields = self.fields()
+        if all(-len(fields) <= k < len(fields) and fields[k] == v for k, v in expected.items()):
+            return fields[index]
+        self.mm.seek(pos)
+        return None
+
+    def required(self, what, index, expected):
+        value = self.optional(index, expected)
+        if value is None:
+            raise LogFormatError(f'{self.path}: expected {what} at byte {self.mm.tell()}')
+        return value
+
+    def multiline(self):
+        """Text between <<<| and |>>> lines, or None if the next line does not open one."""
+        pos = self.mm.tell()
+        if not self.readline().startswith('<<<|'):
+            self.mm.seek(pos)
+            return None
+        lines = []
+        while True:
+            line = self.readline()
+            if line.startswith('|>>>'):
+                return ''.join(line + '\n' for line in lines)
+            lines.append(line)
+
+    def count(self):
+        return int(self.fields()[0])
+
+
+def parse_log(path, batch_rows=BATCH_ROWS):
+    """Generator over one OMPL benchmark log, yielding messages for the writer.
+
+    Messages are tuples: ('experiment', values), ('enum', name, descriptions),
+    ('planner', index, name, settings, [(column, type)]), ('runs', index, rows),
+    ('progress_columns', index, [(column, type)]) and
+    ('progress', index, [(run index, values...)]). Row messages hold at most
+    batch_rows rows, so memory stays bounded however large the log is.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise LogFormatError(f'{path}: empty log file')
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from _parse(_LogReader(path, mm), batch_rows)
+
+
+def _parse(log, batch_rows):
+    libname = log.optional(0, {1: 'version'}) or 'OMPL'
+    log.mm.seek(0)
+    version = ' '.join([libname, log.optional(-1, {1: 'version'}) or '0.0.0'])
+    name = log.required('experiment name', -1, {0: 'Experiment'})
+
+    properties = {}
+    for _ in range(int(log.optional(0, {-2: 'experiment', -1: 'properties'}) or 0)):
+        entry = log.readline().strip().split('=')
+        column, column_type = entry[0].split(' ')[:2]
+        properties[column] = (entry[1], column_type)
+
+    hostname = log.required('hostname', -1, {0: 'Running'})
+    fields = log.fields()
+    if not fields or fields[0] != 'Starting':
+        raise LogFormatError(f'{log.path}: expected start date at byte {log.mm.tell()}')
+    date = ' '.join(fields[2:])
+    setup = log.multiline()
+    cpuinfo = log.multiline()
+    seed = int(log.required('random seed', 0, {-2: 'random', -1: 'seed'}))
+    timelimit = float(log.required('time limit', 0, {-3: 'seconds', -2: 'per', -1: 'run'}))
+    memorylimit = float(log.required('memory limit', 0, {-3: 'MB', -2: 'per', -1: 'run'}))
+    runcount = int(log.optional(0, {-3: 'runs', -2: 'per', -1: 'planner'}) or -1)
+    totaltime = float(log.required('total time', 0, {-3: 'collect', -2: 'the', -1: 'data'}))
+
+    yield ('experiment', {
+        'name': name, 'totaltime': totaltime, 'timelimit': timelimit, 'memorylimit': memorylimit,
+        'runcount': runcount, 'version': version, 'hostname': hostname, 'cpuinfo': cpuinfo,
+        'date': date, 'seed': seed, 'setup': setup, 'properties': properties,
+    })
+
+    for _ in range(int(log.optional(0, {-2: 'enum'}) or 0)):
+        enum = log.readline().split('|')
+        yield ('enum', enum[0], enum[1:])
+
+    num_planners = int(log.required('planner count', 0, {-1: 'planners'}))
+    for index in range(num_planners):
+        planner = log.readline()
+        settings = ''.join(log.readline() + '\n;' for _ in range(log.count()))
+        columns = []
+        for _ in range(log.count()):
+            field = log.fields()
+            columns.append(('_'.join(field[:-1]), field[-1]))
+        yield ('planner', index, planner, settings, columns)
+
+        rows = []
+        for _ in range(log.count()):
+            rows.append([None if x in INVALID_VALUES else x for x in log.readline().split('; ')[:-1]])
+            if len(rows) >= batch_rows:
+                yield ('runs', index, rows)
+                rows = []
+        if rows:
+            yield ('runs', index, rows)
+
+        # Progress data is optional; a planner block without it ends with '.'
+        next_line = log.readline().strip()
+        if next_line == '.':
+            continue
+        columns = []
+        for _ in range(int(next_line.split()[0])):
+            field = log.fields()
+            columns.append(('_'.join(field[:-1]), field[-1]))
+        yield ('progress_columns', index, columns)
+
+        rows = []
+        for run in range(log.count()):
+            for sample in log.readline().split(';')[:-1]:
+                rows.append([run] + [None if x in INVALID_VALUES else x for x in sample.split(',')[:-1]])
+            if len(rows) >= batch_rows:
+                yield ('progress', index, rows)
+                rows = []
+        if rows:
+            yield ('progress', index, rows)
+        log.readline()
+
+
+class _Writer:
+    """Single SQLite writer applying parse messages from any number of logs."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.logs = {}
+        self.next_run_id = conn.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM runs').fetchone()[0]
+
+    def _columns(self, table):
+        return {row[1] for row in self.conn.execute(f'PRAGMA table_info({table})')}
+
+    def _add_columns(self, table, columns):
+        existing = self._columns(table)
+        for column, column_type in columns:
+            if column not in existing:
+                self.conn.execute(f'ALTER TABLE {table} ADD {column} {column_type}')
+                existing.add(column)
+
+    def apply(self, path, message):
+        kind = message[0]
+        state = self.logs.setdefault(path, {'planners': {}, 'duplicates': 0})
+
+        if kind == 'experiment':
+            values = dict(message[1])
+            properties = values.pop('properties')
+            self._add_columns('experiments', [(k, t) for k, (_, t) in sorted(properties.items())])
+            values.update({k: v for k, (v, _) in properties.items()})
+            cursor = self.conn.execute(
+                f'INSERT INTO experiments ({", ".join(values)}) VALUES ({", ".join("?" * len(values))})',
+                list(values.values()))
+            state['experiment_id'] = cursor.lastrowid
+
+        elif kind == 'enum':
+            _, name, descriptions = message
+            if self.conn.execute('SELECT 1 FROM enums WHERE name = ?', (name,)).fetchone() is None:
+                self.conn.executemany('INSERT INTO enums VALUES (?, ?, ?)',
+                                      [(name, i, d) for i, d in enumerate(descriptions)])
+
+        elif kind == 'planner':
+            _, index, name, settings, columns = message
+            row = self.conn.execute('SELECT id FROM plannerConfigs WHERE name = ? AND settings = ?',
+                                    (name, settings)).fetchone()
+            planner_id = row[0] if row else self.conn.execute(
+                'INSERT INTO plannerConfigs (name, settings) VALUES (?, ?)', (name, settings)).lastrowid
+            self._add_columns('runs', columns)
+            names = ['id', 'experimentid', 'plannerid'] + [c for c, _ in columns]
+            state['planners'][index] = {
+                'id': planner_id, 'run_ids': [],
+                'insert': f'INSERT INTO runs ({", ".join(names)}) VALUES ({", ".join("?" * len(names))})',
+            }
+
+        elif kind == 'runs':
+            _, index, rows = message
+            planner = state['planners'][index]
+            first = self.next_run_id
+            self.next_run_id += len(rows)
+            run_ids = range(first, self.next_run_id)
+            planner['run_ids'].extend(run_ids)
+            self.conn.executemany(planner['insert'], (
+                [run_id, state['experiment_id'], planner['id']] + row for run_id, row in zip(run_ids, rows)))
+
+        elif kind == 'progress_columns':
+            _, index, columns = message
+            self._add_columns('progress', columns)
+            names = ['runid'] + [c for c, _ in columns]
+            state['planners'][index]['insert_progress'] = (
+                f'INSERT OR IGNORE INTO progress ({", ".join(names)}) VALUES ({", ".join("?" * len(names))})')
+
+        elif kind == 'progress':
+            _, index, rows = message
+            planner = state['planners'][index]
+            run_ids = planner['run_ids']
+            before = self.conn.total_changes
+            self.conn.executemany(planner['insert_progress'], ([run_ids[row[0]]] + row[1:] for row in rows))
+            state['duplicates'] += len(rows) - (self.conn.total_changes - before)
+
+    def finish(self, path):
+        state = self.logs.pop(path, {'planners': {}, 'duplicates': 0})
+        runs = sum(len(p['run_ids']) for p in state['planners'].values())
+        print(f'Ingested {path}: {len(state["planners"])} planners, {runs} runs')
+        if state['duplicates']:
+            print(f'Ignored {state["duplicates"]} duplicate progress samples in {path}. Consider increasing '
+                  'ompl::tools::Benchmark::Request::timeBetweenUpdates.')
+
+
+def _parse_worker(tasks, results, batch_rows):
+    for path in iter(tasks.get, None):
+        try:
+            for message in parse_log(path, batch_rows):
+                results.put((path, message))
+            results.put((path, ('done',)))
+        except Exception as e:
+            detail = str(e) if isinstance(e, LogFormatError) else f'{path}: {type(e).__name__}: {e}'
+            results.put((path, ('error', detail)))
+
+
+def _parallel_messages(paths, workers, batch_rows):
+    """(path, message) pairs from parse worker processes, finishing each log with ('done',)."""
+    ctx = pool_context() or multiprocessing.get_context()
+    tasks = ctx.Queue()
+    # Bounded so parsers cannot run arbitrarily far ahead of the writer
+    results = ctx.Queue(maxsize=workers * 16)
+    for path in paths:
+        tasks.put(path)
+    for _ in range(workers):
+        tasks.put(None)
+
+    processes = [ctx.Process(target=_parse_worker, args=(tasks, results, batch_rows), daemon=True)
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        remaining = len(paths)
+        while remaining:
+            try:
+                path, message = results.get(timeout=1.0)
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes):
+                    raise RuntimeError('Log parse workers exited before finishing')
+                continue
+            if message[0] == 'error':
+                raise LogFormatError(message[1])
+            if message[0] == 'done':
+                remaining -= 1
+            yield path, message
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+
+def _serial_messages(paths, batch_rows):
+    for path in paths:
+        for message in parse_log(path, batch_rows):
+            yield path, message
+        yield path, ('done',)
+
+
+@traced()
+def ingest_logs(log_paths, db_path, workers=None, batch_rows=BATCH_ROWS):
+    """Parse OMPL benchmark logs into an SQLite database with the OMPL schema.
+
+    Logs are parsed in up to `workers` processes and written by this process
+    alone, in batches, inside a single transaction: either every log is
+    added or, on any parse error, none is. The database is left in WAL mode.
+    A log passed more than once is only ingested once.
+    """
+    log_paths = list(dict.fromkeys(os.path.abspath(path) for path in log_paths))
+    workers = min(workers or os.cpu_count() or 1, len(log_paths))
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        # Run ids are assigned by the writer itself, so the foreign keys hold
+        # by construction and need not be checked for every progress row
+        conn.execute('PRAGMA foreign_keys = OFF')
+        conn.execute(f'PRAGMA cache_size = -{CACHE_SIZE_KIB}')
+        conn.executescript(SCHEMA)
+
+        conn.execute('BEGIN')
+        writer = _Writer(conn)
+        messages = (_parallel_messages(log_paths, workers, batch_rows) if workers > 1
+                    else _serial_messages(log_paths, batch_rows))
+        try:
+            for path, message in messages:
+                if message[0] == 'done':
+                    writer.finish(path)
+                else:
+                    writer.apply(path, message)
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Import OMPL benchmark log files into an SQLite database.')
+    parser.add_argument('logs', nargs='+', help='benchmark .log files')
+    parser.add_argument('-d', '--database', default='benchmark.db', help='output database (default: benchmark.db)')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='parse worker processes (default: all cores)')
+    args = parser.parse_args()
+
+    print(f'Ingesting {len(args.logs)} log file(s) into {args.database}...')
+    ingest_logs(args.logs, args.database, workers=args.jobs)
+    print(f'Database {args.database} is ready')
@@ -0,0 +1,245 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+
+# Set BENCH_TRACE=1 (or to a path) to trace any script; BENCH_TRACE_CHROME=1
+# also writes a Chrome trace and BENCH_TRACE_MALLOC=1 adds tracemalloc peaks
+TRACE_ENV = 'BENCH_TRACE'
+DEFAULT_TRACE_PATH = 'trace.json'
+
+
+def _read_status(field):
+    # Value of a /proc/self/status line in MB, or None off Linux
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss():
+    """Restart the peak-RSS high-water mark (Linux); returns the current RSS in MB."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+    return _read_status('VmRSS')
+
+
+def peak_rss():
+    """Peak RSS in MB since the last reset_peak_rss() (since start-up where that is unsupported).
+
+    None where neither /proc nor the resource module is available (Windows).
+    """
+    peak = _read_status('VmHWM')
+    if peak is None:
+        try:
+            import resource  # Unix only
+        except ImportError:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return peak
+
+
+def count_rows(value):
+    """Rows of a DataFrame/array (of the first one in a tuple or list); None for anything else."""
+    if isinstance(value, (tuple, list)):
+        for item in value:
+            rows = count_rows(item)
+            if rows is not None:
+                return rows
+        return None
+    shape = getattr(value, 'shape', None)
+    if shape:
+        return int(shape[0])
+    return None
+
+
+class _NullStage:
+    # Stand-in while tracing is off: entering and leaving it does nothing
+    rows_out = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Stage:
+    """One timed section; set rows_out inside the block to record output rows."""
+
+    def __init__(self, tracer, name, rows_in):
+        self.tracer = tracer
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.peak_rss_mb = 0.0
+        self.peak_traced_mb = 0.0
+
+    def __enter__(self):
+        self.tracer._enter(self)
+        self.start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.wall = time.perf_counter() - self.start
+        self.cpu = time.process_time() - self.cpu_start
+        self.tracer._exit(self, failed=exc_type is not None)
+        return False
+
+
+class Tracer:
+    """Collects stages: wall and CPU time, peak RSS, optional tracemalloc peak and row counts.
+
+    CPU time is the whole process's, so it includes worker threads. Peaks
+    are high-water marks that get reset when a stage starts, so each stage
+    folds the peak seen so far into every enclosing stage before resetting;
+    nested stages therefore never hide memory from their parents.
+    """
+
+    def __init__(self, malloc=False):
+        self.malloc = malloc
+        self.origin = time.perf_counter()
+        self.records = []
+        self._open = []
+        self._stacks = threading.local()
+        self._lock = threading.Lock()
+        if malloc:
+            import tracemalloc
+            tracemalloc.start()
+
+    def _fold_peaks(self):
+        rss = peak_rss() or 0.0
+        traced = None
+        if self.malloc:
+            import tracemalloc
+            traced = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.reset_peak()
+        for stage in self._open:
+            stage.peak_rss_mb = max(stage.peak_rss_mb, rss)
+            if traced is not None:
+                stage.peak_traced_mb = max(stage.peak_traced_mb, traced)
+        reset_peak_rss()
+
+    def _stack(self):
+        # Stages open in the calling thread, for nesting depth
+        if not hasattr(self._stacks, 'open'):
+            self._stacks.open = []
+        return self._stacks.open
+
+    def _enter(self, stage):
+        stack = self._stack()
+        stage.depth = len(stack)
+        stack.append(stage)
+        with self._lock:
+            self._fold_peaks()
+            self._open.append(stage)
+
+    def _exit(self, stage, failed):
+        self._stack().remove(stage)
+        with self._lock:
+            self._fold_peaks()
+            self._open.remove(stage)
+            record = {
+                'name': stage.name, 'depth': stage.depth, 'thread': threading.get_ident(),
+                'start': round(stage.start - self.origin, 6), 'wall': round(stage.wall, 6),
+                'cpu': round(stage.cpu, 6), 'peak_rss_mb': round(stage.peak_rss_mb, 1),
+                'rows_in': stage.rows_in, 'rows_out': stage.rows_out,
+            }
+            if self.malloc:
+                record['peak_traced_mb'] = round(stage.peak_traced_mb, 1)
+            if failed:
+                record['failed'] = True
+            self.records.append(record)
+
+    def stage(self, name, rows_in=None):
+        return Stage(self, name, rows_in)
+
+    def write(self, path=DEFAULT_TRACE_PATH, chrome=False):
+        """Write the stages as JSON to path (and a Chrome trace next to it); returns the paths."""
+        records = sorted(self.records, key=lambda record: record['start'])
+        with open(path, 'w') as f:
+            json.dump({'pid': os.getpid(), 'stages': records}, f, indent=1)
+        paths = [path]
+        if chrome:
+            chrome_path = os.path.splitext(path)[0] + '.chrome.json'
+            # Complete ('X') events in microseconds, viewable in chrome://tracing or Perfetto
+            events = [{'name': record['name'], 'ph': 'X', 'pid': os.getpid(), 'tid': record['thread'],
+                       'ts': record['start'] * 1e6, 'dur': record['wall'] * 1e6,
+                       'args': {key: value for key, value in record.items()
+                                if key not in ('name', 'start', 'wall', 'thread', 'depth')}}
+                      for record in records]
+            with open(chrome_path, 'w') as f:
+                json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+            paths.append(chrome_path)
+        return paths
+
+
+_tracer = None
+_output = None
+
+
+def _write_at_exit():
+    paths = _tracer.write(*_output)
+    print(f'Stage trace written to {" and ".join(paths)}')
+
+
+def enable(path=DEFAULT_TRACE_PATH, chrome=False, malloc=False):
+    """Start tracing; the trace is written to path when the program exits."""
+    global _tracer, _output
+    if _tracer is None:
+        atexit.register(_write_at_exit)
+    _tracer = Tracer(malloc=malloc)
+    _output = (path, chrome)
+    return _tracer
+
+
+def enabled():
+    return _tracer is not None
+
+
+def stage(name, rows_in=None):
+    """Context manager timing a block as a named stage (a no-op while tracing is off)."""
+    if _tracer is None:
+        return _NULL_STAGE
+    return _tracer.stage(name, rows_in)
+
+
+def traced(name=None):
+    """Decorator recording every call as a stage.
+
+    Rows in are those of the first argument, rows out those of the return
+    value (see count_rows). While tracing is off the function is called
+    directly, after a single check.
+    """
+    def decorate(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with _tracer.stage(label, count_rows(args[0]) if args else None) as current:
+                result = func(*args, **kwargs)
+                current.rows_out = count_rows(result)
+            return result
+        return wrapper
+    return decorate
+
+
+if os.environ.get(TRACE_ENV):
+    _path = os.environ[TRACE_ENV]
+    enable(DEFAULT_TRACE_PATH if _path == '1' else _path,
+           chrome=os.environ.get('BENCH_TRACE_CHROME') == '1', malloc=os.environ.get('BENCH_TRACE_MALLOC') == '1')
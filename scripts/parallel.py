@@ -0,0 +1,15 @@
+import multiprocessing
+
+
+def pool_context():
+    """Multiprocessing context for worker pools started from the report scripts.
+
+    The scripts are plain top-level code, so workers must be forked rather
+    than spawned (spawning would re-run the calling script). Returns None
+    where fork is unavailable, and callers then do the work serially.
+    Forking copies only the calling thread, so finish background threads
+    (e.g. an ExportJob) before starting a pool.
+    """
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return None
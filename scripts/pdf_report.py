@@ -0,0 +1,49 @@
+import os
+
+from instrument import traced
+
+
+def iter_pdf_pages(paths):
+    """Yield the pages of each PDF in order, opening the sources lazily."""
+    from pypdf import PdfReader
+
+    for path in paths:
+        reader = PdfReader(path)
+        for page in reader.pages:
+            yield page
+
+
+@traced()
+def assemble_pdf(paths, out_path, remove_sources=False):
+    """Concatenate existing (vector) PDFs into one report.
+
+    Pages are copied as-is, so plots stay vector graphics instead of being
+    rasterised and re-embedded. The writer holds every page (and its source
+    reader) in memory until the report is written, so peak memory grows with
+    the combined size of the inputs. Missing inputs are skipped with a
+    message. Returns the number of pages written.
+    """
+    from pypdf import PdfWriter
+
+    sources = []
+    for path in paths:
+        if os.path.exists(path):
+            sources.append(path)
+        else:
+            print(f'Skipping missing PDF {path}')
+
+    writer = PdfWriter()
+    pages = 0
+    for page in iter_pdf_pages(sources):
+        writer.add_page(page)
+        pages += 1
+
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        writer.write(f)
+    os.replace(tmp_path, out_path)
+
+    if remove_sources:
+        for path in sources:
+            os.remove(path)
+    return pages
@@ -0,0 +1,221 @@
+import argparse
+import datetime
+import gc
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+
+from database import ensure_indexes
+from instrument import peak_rss, reset_peak_rss
+import synthetic_db
+from synthetic_db import generate_database
+
+# planners x runs per planner x progress rows per run
+SCALES = {
+    'small': (3, 100, 100),
+    'medium': (3, 1_000, 200),
+    'large': (6, 5_000, 500),
+}
+
+STAGES = ['load', 'aggregate', 'convergence', 'box_plots', 'excel']
+
+# Generated databases are kept here and reused while the generator is unchanged
+PERF_CACHE_DIR = os.path.join('.results_cache', 'perf')
+
+HISTORY_FILE = 'perf_history.jsonl'
+
+# A stage is flagged when it gets this much slower (or bigger) than the baseline
+REGRESSION_THRESHOLD = 0.2
+
+
+def source_version():
+    """git describe of the scripts directory, so results can be compared between versions."""
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def scale_database(scale, cache_dir=PERF_CACHE_DIR):
+    planners, runs, points = SCALES[scale]
+    with open(synthetic_db.__file__, 'rb') as f:
+        generator = hashlib.sha1(f.read()).hexdigest()[:8]
+    db_path = os.path.join(cache_dir, f'{scale}-{planners}x{runs}x{points}-{generator}.db')
+    if not os.path.exists(db_path):
+        os.makedirs(cache_dir, exist_ok=True)
+        print(f'Generating {scale} database ({planners} planners x {runs} runs x {points} progress rows)...')
+        generate_database(db_path + '.tmp', planners, runs, points)
+        # Index now so the load stage never times the one-off indexing
+        ensure_indexes(db_path + '.tmp')
+        os.replace(db_path + '.tmp', db_path)
+    return db_path
+
+
+# Each stage gets the outputs of earlier stages in `data` and returns the
+# number of rows it consumed; only the stage call itself is measured
+
+def load_stage(data, db_path, out_dir):
+    from results_loader import load_progress, load_runs
+    data['runs'] = load_runs(db_path, use_cache=False)
+    data['progress'] = load_progress(db_path, use_cache=False)
+    return len(data['runs']) + len(data['progress'])
+
+
+def aggregate_stage(data, db_path, out_dir):
+    from build_report import PERFORMANCE_COLUMNS
+    from comparison import facet_percentage_changes
+    from summary_stats import grouped_statistics
+    data['statistics'] = grouped_statistics(data['runs'], PERFORMANCE_COLUMNS)
+    data['changes'] = facet_percentage_changes(data['statistics'])
+    return len(data['runs'])
+
+
+def convergence_stage(data, db_path, out_dir):
+    from anytime import anytime_bands, experiment_grids
+    from results_loader import load_experiments
+    # Same grids as bench.py convergence: one per experiment, up to its time limit
+    grids = experiment_grids(load_experiments(db_path))
+    data['bands'] = anytime_bands(data['progress'], grids)
+    return len(data['progress'])
+
+
+def box_plots_stage(data, db_path, out_dir):
+    from boxplots import render_box_plots
+    from build_report import PERFORMANCE_COLUMNS
+    # Every metric and facet in the process pool, as the scripts render them
+    render_box_plots(data['runs'], PERFORMANCE_COLUMNS, os.path.join(out_dir, 'performance_box_plots.pdf'),
+                     image_pattern=os.path.join(out_dir, '{column}{facet}_box_plot.png'))
+    return len(data['runs'])
+
+
+def excel_stage(data, db_path, out_dir):
+    from excel_report import ExcelReport
+    with ExcelReport(os.path.join(out_dir, 'performance_summary.xlsx')) as workbook:
+        workbook.write(data['statistics'].reset_index(), 'Performance Statistics')
+        workbook.write(data['changes'], 'Percentage Changes')
+        workbook.write(data['bands'], 'Median Best Cost')
+        workbook.write_raw(data['runs'])
+    return len(data['runs'])
+
+
+STAGE_FUNCTIONS = {
+    'load': load_stage,
+    'aggregate': aggregate_stage,
+    'convergence': convergence_stage,
+    'box_plots': box_plots_stage,
+    'excel': excel_stage,
+}
+
+
+def run_suite(scales, repeat=1, cache_dir=PERF_CACHE_DIR):
+    """Time every stage at every scale; returns one record per (scale, stage).
+
+    seconds is the best of `repeat` runs; peak_rss_mb is the highest resident
+    memory while the stage ran and rss_growth_mb how far above the memory
+    held before the stage that was.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+
+    version = source_version()
+    stamp = datetime.datetime.now().isoformat(timespec='seconds')
+    records = []
+    for scale in scales:
+        db_path = scale_database(scale, cache_dir)
+        planners, runs, points = SCALES[scale]
+        out_dir = tempfile.mkdtemp(prefix=f'perf-{scale}-')
+        try:
+            data = {}
+            for stage in STAGES:
+                best = None
+                for _ in range(repeat):
+                    gc.collect()
+                    before = reset_peak_rss()
+                    start = time.perf_counter()
+                    rows = STAGE_FUNCTIONS[stage](data, db_path, out_dir)
+                    elapsed = time.perf_counter() - start
+                    # 0 where the platform cannot report it, so runs stay comparable
+                    peak = peak_rss() or 0.0
+                    if best is None or elapsed < best[0]:
+                        best = (elapsed, peak, peak - before if before is not None else None)
+                record = {
+                    'version': version, 'date': stamp, 'host': platform.node(), 'python': platform.python_version(),
+                    'scale': scale, 'planners': planners, 'runs': runs, 'progress_points': points,
+                    'stage': stage, 'rows': rows, 'seconds': round(best[0], 4),
+                    'peak_rss_mb': round(best[1], 1),
+                    'rss_growth_mb': None if best[2] is None else round(best[2], 1),
+                }
+                records.append(record)
+                print(f'{scale:>7} {stage:<12} {record["seconds"]:9.3f}s {record["peak_rss_mb"]:9.1f} MB peak')
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+    return records
+
+
+def load_history(path=HISTORY_FILE):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_history(records, path=HISTORY_FILE):
+    with open(path, 'a') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+
+def compare_records(records, history, baseline=None, threshold=REGRESSION_THRESHOLD):
+    """Compare records against the latest earlier result per (scale, stage).
+
+    Only results of another version are used, or of `baseline` if given.
+    Returns (scale, stage, old seconds, new seconds, old peak, new peak,
+    regressed) tuples.
+    """
+    latest = {}
+    for old in history:
+        wanted = old['version'] != records[0]['version'] if baseline is None else old['version'] == baseline
+        if not wanted:
+            continue
+        latest[old['scale'], old['stage']] = old
+    comparisons = []
+    for new in records:
+        old = latest.get((new['scale'], new['stage']))
+        if old is None:
+            continue
+        regressed = (new['seconds'] > old['seconds'] * (1 + threshold)
+                     or new['peak_rss_mb'] > old['peak_rss_mb'] * (1 + threshold))
+        comparisons.append((new['scale'], new['stage'], old['seconds'], new['seconds'],
+                            old['peak_rss_mb'], new['peak_rss_mb'], regressed))
+    return comparisons
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time each analysis stage on synthetic databases.')
+    parser.add_argument('--scales', nargs='+', choices=list(SCALES), default=['small', 'medium'])
+    parser.add_argument('--repeat', type=int, default=1, help='runs per stage; the fastest is kept')
+    parser.add_argument('--history', default=HISTORY_FILE, help='JSON lines file results are appended to')
+    parser.add_argument('--baseline', help='version to compare against (default: the latest other version)')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args()
+
+    history = load_history(args.history)
+    records = run_suite(args.scales, args.repeat)
+    save_history(records, args.history)
+    print(f'Results appended to {args.history}')
+
+    comparisons = compare_records(records, history, args.baseline, args.threshold)
+    regressions = 0
+    for scale, stage, old_s, new_s, old_mb, new_mb, regressed in comparisons:
+        regressions += regressed
+        flag = '  REGRESSION' if regressed else ''
+        print(f'{scale:>7} {stage:<12} {old_s:8.3f}s -> {new_s:8.3f}s   {old_mb:8.1f} -> {new_mb:8.1f} MB{flag}')
+    if regressions and args.fail_on_regression:
+        raise SystemExit(f'{regressions} stage(s) regressed by more than {args.threshold:.0%}')
@@ -1,52 +1,13 @@
-import subprocess
-import sys
-import sqlite3
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from matplotlib.backends.backend_pdf import PdfPages
+from results_loader import load_runs, load_progress
+from traces import plot_best_cost_runs
 
-# Function to install a package
-def install(package):
-    subprocess.check_call([sys.executable, '-m', 'pip', 'install', package])
-
-# Install required packages if not already installed
-try:
-    import pandas as pd
-    import matplotlib.pyplot as plt
-    import seaborn as sns
-except ImportError:
-    install('pandas')
-    install('matplotlib')
-    install('seaborn')
-    import pandas as pd
-    import matplotlib.pyplot as plt
-    import seaborn as sns
-
-# Connect to SQLite database
-print("Connecting to database...")
-conn = sqlite3.connect('mydatabase_gaussian.db')
-
-# Query the runs and progress data
-print("Fetching data from database...")
-runs_query = """
-    SELECT REPLACE(plannerConfigs.name, 'geometric_', '') AS name, runs.*
-    FROM plannerConfigs
-    INNER JOIN runs ON plannerConfigs.id = runs.plannerid
-"""
-progress_query = """
-    SELECT REPLACE(plannerConfigs.name, 'geometric_', '') AS name, progress.*
-    FROM plannerConfigs
-    INNER JOIN runs ON plannerConfigs.id = runs.plannerid
-    INNER JOIN progress ON runs.id = progress.runid
-"""
-
-# Load data into DataFrames
-runs_df = pd.read_sql_query(runs_query, conn)
-progress_df = pd.read_sql_query(progress_query, conn)
-
-# Close the connection
-conn.close()
+# Load results through the shared cached loader
+db_path = 'mydatabase_gaussian.db'
+runs_df = load_runs(db_path)
+progress_df = load_progress(db_path)
 
 # Plotting
 sns.set(style="whitegrid")
@@ -65,7 +26,8 @@ plt.savefig('boxplot_times.pdf')
 # Plot 2: Best Cost over Time for all runs
 print("Creating line plot for change in best cost over time...")
 plt.figure(figsize=(10, 6))
-sns.lineplot(x='time', y='best_cost', hue='name', data=progress_df, alpha=0.5)
+# One decimated step line per run instead of joining every run of a planner
+plot_best_cost_runs(plt.gca(), progress_df)
 plt.title('Change in Best Cost over Time')
 plt.xlabel('Time')
 plt.ylabel('Best Cost')
@@ -0,0 +1,128 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from instrument import traced
+from quantile_sketch import DDSketch
+from results_loader import connect, iter_progress_chunks
+
+# Bins follow pd.cut semantics: (start, start + width], ..., (stop - width, stop],
+# numbered from 0. Samples without a best cost (no solution yet) are ignored,
+# and {experiment_filter} optionally keeps the runs of one experiment (by id).
+# Medians use window functions (SQLite >= 3.25), so only the aggregated rows
+# leave the database.
+INTERVAL_MEDIAN_QUERY = """
+    WITH binned AS (
+        SELECT REPLACE(plannerConfigs.name, 'geometric_', '') AS name,
+               progress.{value} AS value,
+               CAST((progress.time - :start) / :width AS INTEGER)
+                 - ((progress.time - :start) / :width
+                    = CAST((progress.time - :start) / :width AS INTEGER)) AS interval
+        FROM plannerConfigs
+        INNER JOIN runs ON plannerConfigs.id = runs.plannerid
+        INNER JOIN progress ON runs.id = progress.runid
+        WHERE progress.time > :start AND progress.time <= :stop
+          AND progress.{value} IS NOT NULL{experiment_filter}
+    ),
+    ranked AS (
+        SELECT interval, name, value,
+               ROW_NUMBER() OVER (PARTITION BY interval, name ORDER BY value) AS row_number,
+               COUNT(*) OVER (PARTITION BY interval, name) AS samples
+        FROM binned
+    )
+    SELECT interval, name, AVG(value) AS {value}, MAX(samples) AS samples
+    FROM ranked
+    WHERE row_number IN ((samples + 1) / 2, (samples + 2) / 2)
+    GROUP BY interval, name
+    ORDER BY interval, name
+"""
+
+
+@traced()
+def interval_medians(db_path, start=0.0, stop=100.0, bins=20, value='best_cost', experimentid=None):
+    """Median of a progress column per (time interval, planner), computed in SQLite.
+
+    Returns columns interval, name, <value>, samples and interval_label (the
+    start of each interval), matching the old pd.cut + groupby().median().
+    With experimentid (an id from the experiments table), only that
+    experiment's runs are binned; experiment names repeat across samplers.
+    """
+    if sqlite3.sqlite_version_info < (3, 25, 0):
+        raise RuntimeError(f'SQLite {sqlite3.sqlite_version} has no window functions (need 3.25+)')
+
+    edges = np.linspace(start, stop, bins + 1)
+    params = {'start': float(start), 'stop': float(stop), 'width': (stop - start) / bins}
+    experiment_filter = ''
+    if experimentid is not None:
+        experiment_filter = '\n          AND runs.experimentid = :experimentid'
+        params['experimentid'] = int(experimentid)
+
+    conn = connect(db_path)
+    try:
+        query = INTERVAL_MEDIAN_QUERY.format(value=value, experiment_filter=experiment_filter)
+        df = pd.read_sql_query(query, conn, params=params)
+    finally:
+        conn.close()
+
+    interval_mapping = {i: int(edges[i]) for i in range(bins)}
+    df['interval_label'] = df['interval'].map(interval_mapping)
+    return df
+
+
+@traced()
+def sketch_interval_quantiles(db_paths, start=0.0, stop=100.0, bins=20, value='best_cost',
+                              relative_accuracy=0.01, chunk_rows=500_000, sketches=None):
+    """Per-(planner, interval) quantile sketches built from streamed progress chunks.
+
+    Memory depends only on the number of planners and intervals, never on the
+    number of progress rows. Pass an existing dict as sketches to keep adding
+    to it; sketches from several databases (or processes) can be merged
+    with merge_sketches.
+    """
+    sketches = {} if sketches is None else sketches
+    width = (stop - start) / bins
+    if isinstance(db_paths, str):
+        db_paths = [db_paths]
+
+    for db_path in db_paths:
+        for chunk in iter_progress_chunks(db_path, chunk_rows):
+            times = chunk['time'].to_numpy(dtype='float64')
+            values = chunk[value].to_numpy(dtype='float64')
+            keep = (times > start) & (times <= stop) & np.isfinite(values)
+            if not keep.any():
+                continue
+            # Same (a, b] bins as pd.cut
+            interval = np.ceil((times[keep] - start) / width).astype(np.int64) - 1
+            binned = pd.DataFrame({'name': chunk['name'].to_numpy()[keep],
+                                   'interval': interval, 'value': values[keep]})
+            for (name, index), group in binned.groupby(['name', 'interval'], sort=False):
+                key = (name, int(index))
+                if key not in sketches:
+                    sketches[key] = DDSketch(relative_accuracy)
+                sketches[key].add(group['value'].to_numpy())
+    return sketches
+
+
+def merge_sketches(*sketch_dicts):
+    """Merge several {(planner, interval): DDSketch} dicts into a new one."""
+    merged = {}
+    for sketches in sketch_dicts:
+        for key, sketch in sketches.items():
+            if key not in merged:
+                merged[key] = DDSketch(sketch.relative_accuracy, sketch.max_buckets)
+            merged[key].merge(sketch)
+    return merged
+
+
+def sketch_table(sketches, quantiles=(0.25, 0.5, 0.75), start=0.0, stop=100.0, bins=20):
+    """Tidy table of sketch quantiles per (interval, planner), with the error bound."""
+    edges = np.linspace(start, stop, bins + 1)
+    rows = []
+    for (name, index), sketch in sorted(sketches.items(), key=lambda item: (item[0][1], item[0][0])):
+        row = {'interval': index, 'name': name, 'interval_label': int(edges[index]),
+               'samples': sketch.count, 'relative_error': sketch.relative_accuracy}
+        for q in quantiles:
+            row[f'q{int(round(q * 100))}'] = sketch.quantile(q)
+        rows.append(row)
+    return pd.DataFrame(rows)
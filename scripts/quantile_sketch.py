@@ -0,0 +1,103 @@
+import math
+
+import numpy as np
+
+
+class DDSketch:
+    """Mergeable quantile sketch with a relative-error guarantee (DDSketch).
+
+    Values are counted in logarithmic buckets of ratio
+    gamma = (1 + a) / (1 - a), where a is relative_accuracy. Any quantile
+    returned is within a factor (1 +/- a) of the true value of that rank.
+    Memory is bounded by max_buckets per sign; if that is ever exceeded,
+    the smallest-magnitude buckets are collapsed, which only affects the
+    accuracy of the lowest quantiles.
+    Sketches built with the same accuracy can be merged exactly, e.g. across
+    chunks, processes or database files.
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_buckets=2048):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError('relative_accuracy must be in (0, 1)')
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _add_to(self, store, magnitudes):
+        keys, counts = np.unique(np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64),
+                                 return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            store[key] = store.get(key, 0) + count
+        self._collapse(store)
+
+    def _collapse(self, store):
+        if len(store) <= self.max_buckets:
+            return
+        keys = sorted(store)
+        excess = keys[:len(keys) - self.max_buckets + 1]
+        store[excess[-1]] = sum(store.pop(key) for key in excess[:-1]) + store[excess[-1]]
+
+    def add(self, values):
+        """Add an array of values; NaN and infinite values are ignored."""
+        values = np.asarray(values, dtype='float64').ravel()
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return self
+        positive = values[values > 0]
+        negative = values[values < 0]
+        if len(positive):
+            self._add_to(self.positive, positive)
+        if len(negative):
+            self._add_to(self.negative, -negative)
+        self.zero_count += int(len(values) - len(positive) - len(negative))
+        self.count += int(len(values))
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        return self
+
+    def merge(self, other):
+        """Fold another sketch with the same accuracy into this one."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError('Can only merge sketches with the same relative accuracy')
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+            self._collapse(store)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def _value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q):
+        """Approximate q-quantile (0 <= q <= 1); NaN for an empty sketch."""
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return max(-self._value(key), self.min)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return min(self._value(key), self.max)
+        return self.max
+
+    def quantiles(self, qs):
+        return [self.quantile(q) for q in qs]
@@ -0,0 +1,316 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from database import CACHE_DIR, connect, ensure_indexes, stale_versions
+from instrument import stage, traced
+
+# Queries shared by every analysis script. Both are tagged with the experiment
+# name and its sampler_id parameter when the DB has them.
+RUNS_QUERY = """
+    SELECT REPLACE(plannerConfigs.name, 'geometric_', '') AS name,
+           {experiment} AS experiment, {sampler_id} AS sampler_id, runs.*
+    FROM plannerConfigs
+    INNER JOIN runs ON plannerConfigs.id = runs.plannerid
+    {experiments_join}
+"""
+PROGRESS_QUERY = """
+    SELECT REPLACE(plannerConfigs.name, 'geometric_', '') AS name,
+           {experiment} AS experiment, {sampler_id} AS sampler_id,
+           runs.plannerid, runs.experimentid, progress.*
+    FROM plannerConfigs
+    INNER JOIN runs ON plannerConfigs.id = runs.plannerid
+    INNER JOIN progress ON runs.id = progress.runid
+    {experiments_join}
+"""
+
+# Cached tables live in CACHE_DIR next to the database they were read from;
+# bump the version whenever the shape of a cached table changes
+CACHE_VERSION = 6
+
+# Compact in-memory types (see compact_dtypes): names repeated on every row
+# become categoricals, and these REAL columns are stored as float32 as long
+# as that merges no two distinct values of the same run. time stays float64:
+# it is compared against time grids and limits (0.1 as float32 is
+# 0.10000000149, past a 0.1 s grid point)
+CATEGORY_COLUMNS = ['name', 'experiment', 'source', 'config_hash']
+FLOAT32_COLUMNS = ['best_cost']
+
+
+def cache_key(db_path):
+    """Key identifying one version of a database file (path, size and mtime)."""
+    stat = os.stat(db_path)
+    ident = f'{CACHE_VERSION}|{os.path.abspath(db_path)}|{stat.st_size}|{stat.st_mtime_ns}'
+    return hashlib.sha1(ident.encode()).hexdigest()[:16]
+
+
+def _cache_file(db_path, table):
+    db_dir = os.path.dirname(os.path.abspath(db_path))
+    db_name = os.path.splitext(os.path.basename(db_path))[0]
+    return os.path.join(db_dir, CACHE_DIR, f'{db_name}-{cache_key(db_path)}-{table}.parquet')
+
+
+def _drop_stale(cache_file):
+    # Older versions of the same database are never read again
+    for old in stale_versions(cache_file):
+        os.remove(old)
+
+
+def _table_columns(conn, table):
+    return {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+
+
+def declared_types(conn):
+    """Declared SQLite type of every experiments, runs and progress column (upper case)."""
+    types = {}
+    for table in ('experiments', 'runs', 'progress'):
+        for row in conn.execute(f'PRAGMA table_info({table})'):
+            types[row[1]] = row[2].upper()
+    return types
+
+
+def _float32_safe(values, runs=None):
+    finite = np.isfinite(values)
+    if finite.any() and np.abs(values[finite]).max() > np.finfo(np.float32).max:
+        return False
+    if runs is None:
+        return True
+    # Within each run (progress samples), distinct values must stay distinct
+    order = np.lexsort((values, runs))
+    values, runs = values[order], runs[order]
+    same_run = runs[1:] == runs[:-1]
+    narrowed = values.astype(np.float32)
+    merged = same_run & (values[1:] != values[:-1]) & (narrowed[1:] == narrowed[:-1])
+    return not merged.any()
+
+
+def _integer_dtype(values, declared):
+    # Smallest dtype holding integral values exactly: uint8 for flags and
+    # enums, int32 for ids and counts (None if they do not fit)
+    low, high = values.min(), values.max()
+    if declared in ('BOOLEAN', 'ENUM') and low >= 0 and high <= np.iinfo(np.uint8).max:
+        return 'uint8'
+    if np.iinfo(np.int32).min <= low and high <= np.iinfo(np.int32).max:
+        return 'int32'
+    return None
+
+
+def compact_dtypes(df, types):
+    """Convert a loaded table to compact dtypes driven by the declared column types.
+
+    Names become categoricals; BOOLEAN and ENUM columns uint8 (float32 if
+    they have NULLs, which stays exact); INTEGER columns, ids included,
+    int32; best_cost float32 unless that would merge two distinct values
+    within a run. Other columns, time included, keep their dtype.
+    """
+    runs = df['runid'].to_numpy() if 'runid' in df.columns else None
+    converted = {}
+    for column in df.columns:
+        values = df[column]
+        declared = types.get(column, '')
+        if column in CATEGORY_COLUMNS:
+            if values.dtype == object or pd.api.types.is_string_dtype(values):
+                converted[column] = values.astype('category')
+            continue
+        if (len(values) == 0 or not pd.api.types.is_numeric_dtype(values)
+                or pd.api.types.is_bool_dtype(values)):
+            continue
+        array = values.to_numpy(dtype='float64')
+        missing = np.isnan(array).any()
+        if declared in ('BOOLEAN', 'ENUM', 'INTEGER') or column.endswith('id'):
+            if missing:
+                if declared in ('BOOLEAN', 'ENUM'):
+                    converted[column] = values.astype('float32')
+            elif np.array_equal(array, np.round(array)):
+                dtype = _integer_dtype(array, declared)
+                if dtype is not None:
+                    converted[column] = values.astype(dtype)
+        elif column in FLOAT32_COLUMNS and _float32_safe(array, runs):
+            converted[column] = values.astype('float32')
+    if converted:
+        df = df.assign(**converted)
+    return df
+
+
+def _experiment_columns(conn):
+    experiment_columns = _table_columns(conn, 'experiments')
+    if not experiment_columns:
+        return {'experiment': 'NULL', 'sampler_id': 'NULL', 'experiments_join': ''}
+    return {
+        'experiment': 'experiments.name',
+        'sampler_id': 'experiments.sampler_id' if 'sampler_id' in experiment_columns else 'NULL',
+        'experiments_join': 'LEFT JOIN experiments ON experiments.id = runs.experimentid',
+    }
+
+
+def _runs_query(conn):
+    return RUNS_QUERY.format(**_experiment_columns(conn))
+
+
+def _progress_query(conn):
+    return PROGRESS_QUERY.format(**_experiment_columns(conn))
+
+
+def _load_table(db_path, table, query, use_cache):
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f'Database not found: {db_path}')
+    # Indexing touches the file, so do it before the cache key is taken
+    ensure_indexes(db_path)
+
+    cache_file = _cache_file(db_path, table)
+    if use_cache and os.path.exists(cache_file):
+        print(f'Loading {table} from cache {cache_file}')
+        with stage(f'read_parquet {table}') as current:
+            df = pd.read_parquet(cache_file)
+            current.rows_out = len(df)
+        return df
+
+    print(f'Reading {table} from {db_path}...')
+    conn = connect(db_path)
+    try:
+        if callable(query):
+            query = query(conn)
+        with stage(f'read_sql {table}') as current:
+            df = pd.read_sql_query(query, conn)
+            current.rows_out = len(df)
+        types = declared_types(conn)
+    finally:
+        conn.close()
+
+    before = df.memory_usage(deep=True).sum()
+    df = compact_dtypes(df, types)
+    after = df.memory_usage(deep=True).sum()
+    print(f'{table}: {before / 2**20:.1f} MB -> {after / 2**20:.1f} MB in memory '
+          f'({1 - after / max(before, 1):.0%} less) with compact dtypes')
+
+    if use_cache:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp_file = cache_file + '.tmp'
+        try:
+            df.to_parquet(tmp_file, index=False)
+            os.replace(tmp_file, cache_file)
+        except ImportError:
+            # No parquet engine (pyarrow/fastparquet); keep working uncached
+            print('No parquet engine available, results will not be cached')
+        else:
+            _drop_stale(cache_file)
+        finally:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+    return df
+
+
+@traced()
+def load_runs(db_path, use_cache=True):
+    """Runs joined with planner name, experiment name and sampler_id, one row per run."""
+    return _load_table(db_path, 'runs', _runs_query, use_cache)
+
+
+@traced()
+def load_progress(db_path, use_cache=True):
+    """Progress samples joined with planner name and id, experiment id and name and sampler_id, one row per sample."""
+    return _load_table(db_path, 'progress', _progress_query, use_cache)
+
+
+def iter_progress_chunks(db_path, chunk_rows=500_000):
+    """Stream the progress join in DataFrames of at most chunk_rows rows (no caching)."""
+    conn = connect(db_path)
+    try:
+        for chunk in pd.read_sql_query(_progress_query(conn), conn, chunksize=chunk_rows):
+            yield chunk
+    finally:
+        conn.close()
+
+
+def load_experiments(db_path):
+    """The experiments table (name, timelimit, sampler_id, ...); small, so never cached."""
+    conn = connect(db_path)
+    try:
+        return pd.read_sql_query('SELECT * FROM experiments', conn)
+    finally:
+        conn.close()
+
+
+def config_hash(name, settings):
+    """Short hash identifying a planner configuration (name and settings) across databases."""
+    return hashlib.sha1(f'{name}\0{settings or ""}'.encode()).hexdigest()[:12]
+
+
+def load_planner_configs(db_path):
+    """The plannerConfigs table with a config_hash column; small, so never cached.
+
+    The largest run id of the database is kept in df.attrs['max_run_id'].
+    """
+    conn = connect(db_path)
+    try:
+        df = pd.read_sql_query('SELECT id, name, settings FROM plannerConfigs', conn)
+        max_run_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM runs').fetchone()[0]
+    finally:
+        conn.close()
+    df['config_hash'] = [config_hash(name, settings) for name, settings in zip(df['name'], df['settings'])]
+    df.attrs['max_run_id'] = max_run_id
+    return df
+
+
+def source_labels(db_paths):
+    """Short labels for databases (file names), falling back to full paths if they clash."""
+    labels = [os.path.splitext(os.path.basename(path))[0] for path in db_paths]
+    if len(set(labels)) < len(labels):
+        labels = [os.path.abspath(path) for path in db_paths]
+    return labels
+
+
+@traced()
+def load_databases(db_paths, table='runs', use_cache=True, max_workers=None):
+    """Load runs or progress from several databases concurrently into one frame.
+
+    Every row gets a source column (the database it came from). Planner
+    configurations are matched across files by config_hash: the same
+    configuration gets the same plannerid and name everywhere, and a name
+    shared by different configurations is suffixed with its hash. Run ids
+    are offset per database so they stay unique in the combined frame.
+    Returns (df, configs), configs listing each distinct configuration once.
+    """
+    loader = {'runs': load_runs, 'progress': load_progress}[table]
+    db_paths = list(db_paths)
+    labels = source_labels(db_paths)
+
+    def load(db_path):
+        return loader(db_path, use_cache), load_planner_configs(db_path)
+
+    # Parquet reads and SQLite's query execution release the GIL, so cached
+    # loads overlap well; read_sql_query builds its rows as Python objects
+    # while holding it, so uncached loads overlap only partly
+    with ThreadPoolExecutor(max_workers=max_workers or len(db_paths) or 1) as pool:
+        loaded = list(pool.map(load, db_paths))
+
+    configs = pd.concat([c.assign(source=label) for (_, c), label in zip(loaded, labels)], ignore_index=True)
+    configs['name'] = configs['name'].str.replace('geometric_', '', regex=False)
+    distinct = configs.drop_duplicates('config_hash').reset_index(drop=True)
+    distinct['plannerid'] = distinct.index + 1
+    ambiguous = distinct.duplicated('name', keep=False)
+    distinct.loc[ambiguous, 'name'] = distinct['name'] + ' [' + distinct['config_hash'].str[:6] + ']'
+    distinct['sources'] = distinct['config_hash'].map(configs.groupby('config_hash')['source'].agg(', '.join))
+    names = dict(zip(distinct['config_hash'], distinct['name']))
+    planner_ids = dict(zip(distinct['config_hash'], distinct['plannerid']))
+
+    run_id = 'id' if table == 'runs' else 'runid'
+    frames = []
+    offset = 0
+    for (df, planner_configs), label in zip(loaded, labels):
+        hashes = df['plannerid'].map(dict(zip(planner_configs['id'], planner_configs['config_hash'])))
+        df = df.assign(name=hashes.map(names), plannerid=hashes.map(planner_ids))
+        df[run_id] = df[run_id].astype('int64') + offset
+        df.insert(1, 'source', label)
+        df.insert(2, 'config_hash', hashes)
+        frames.append(df)
+        offset += planner_configs.attrs['max_run_id']
+
+    # Concatenating differing categories (and the name remapping) yields
+    # plain objects, so compact the combined frame once more
+    df = compact_dtypes(pd.concat(frames, ignore_index=True), {})
+    return df, distinct[['plannerid', 'name', 'config_hash', 'settings', 'sources']]
@@ -0,0 +1,72 @@
+import pandas as pd
+
+from instrument import traced
+
+# Runs are summarised per planner, sampler and experiment
+GROUP_KEYS = ['name', 'sampler_id', 'experiment']
+
+# Group keys fixing the problem a planner was run on; planners are only
+# compared with the other planners of the same facet
+FACET_KEYS = ['sampler_id', 'experiment']
+
+# Order of the statistics in the summary tables
+STATISTICS = ['mean', 'median', 'std', 'min', 'q1', 'q3', 'max']
+
+
+def _present_keys(df, keys):
+    return [key for key in keys if key in df.columns]
+
+
+@traced()
+def grouped_statistics(df, columns, keys=GROUP_KEYS):
+    """Per-group statistics for every column in a single groupby pass.
+
+    Returns a tidy table with one row per (group, metric) and the columns
+    runs, success_rate and STATISTICS. Boolean flags are treated as 0/1.
+    """
+    keys = _present_keys(df, keys)
+    columns = [column for column in columns if column in df.columns]
+
+    values = df[columns].astype('float64')
+    grouped = values.groupby([df[key] for key in keys], sort=True, dropna=False, observed=True)
+
+    stats = grouped.agg(['mean', 'median', 'std', 'min', 'max'])
+    quartiles = grouped.quantile([0.25, 0.75]).unstack(level=-1)
+    quartiles.columns = quartiles.columns.set_levels(['q1', 'q3'], level=1)
+    stats = pd.concat([stats, quartiles], axis=1)
+    stats.columns.names = ['metric', 'statistic']
+
+    # One row per (group, metric), statistics as columns
+    tidy = stats.stack(level='metric', future_stack=True)[STATISTICS]
+    tidy = tidy.reindex(columns, level='metric')
+
+    counts = df.groupby([df[key] for key in keys], sort=True, dropna=False, observed=True).size()
+    tidy.insert(0, 'runs', counts.reindex(tidy.index.droplevel('metric')).to_numpy())
+    if 'solved' in df.columns:
+        success = df['solved'].astype('float64').groupby(
+            [df[key] for key in keys], sort=True, dropna=False, observed=True).mean()
+        tidy.insert(1, 'success_rate', success.reindex(tidy.index.droplevel('metric')).to_numpy())
+    return tidy
+
+
+def group_labels(index):
+    """Readable row labels, keeping only the key levels that actually vary."""
+    if not isinstance(index, pd.MultiIndex):
+        return index.astype(str)
+    varying = [level for level in range(index.nlevels) if index.get_level_values(level).nunique(dropna=False) > 1]
+    if not varying:
+        varying = [0]
+    return pd.Index([
+        ' / '.join(str(row[level]) for level in varying)
+        for row in index
+    ])
+
+
+@traced()
+def statistic_table(stats, statistic='mean'):
+    """One statistic as a wide group x metric table (e.g. the old per-planner means)."""
+    table = stats[statistic].unstack(level='metric')
+    table = table[stats.index.get_level_values('metric').unique()]
+    table.index = group_labels(table.index)
+    table.columns.name = None
+    return table
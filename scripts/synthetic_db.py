@@ -0,0 +1,169 @@
+import argparse
+import os
+import sqlite3
+
+import numpy as np
+
+from ingest_logs import CACHE_SIZE_KIB, SCHEMA
+
+# Planners of SE3RigidBodyPlanningBenchmark.cpp; further ones get generic names
+PLANNERS = ['geometric_RRTstar', 'geometric_InformedRRTstar', 'geometric_GRRTstar']
+
+SETTINGS = ('{"delay_collision_checking": "1", "goal_bias": "0.05", "range": "0", '
+            '"rewire_factor": "1.1", "use_k_nearest": "1"}')
+
+# Run properties in the order and with the types OMPL logs them
+RUN_PROPERTIES = [
+    ('approximate_solution', 'BOOLEAN'), ('best_cost', 'REAL'), ('correct_solution', 'BOOLEAN'),
+    ('correct_solution_strict', 'BOOLEAN'), ('graph_motions', 'INTEGER'), ('graph_states', 'INTEGER'),
+    ('iterations', 'INTEGER'), ('memory', 'REAL'), ('simplification_time', 'REAL'),
+    ('simplified_correct_solution', 'BOOLEAN'), ('simplified_correct_solution_strict', 'BOOLEAN'),
+    ('simplified_solution_clearance', 'REAL'), ('simplified_solution_length', 'REAL'),
+    ('simplified_solution_segments', 'INTEGER'), ('simplified_solution_smoothness', 'REAL'),
+    ('solution_clearance', 'REAL'), ('solution_difference', 'REAL'), ('solution_length', 'REAL'),
+    ('solution_segments', 'INTEGER'), ('solution_smoothness', 'REAL'), ('solved', 'BOOLEAN'),
+    ('status', 'ENUM'), ('time', 'REAL'), ('valid_segment_fraction', 'REAL'),
+]
+
+PROGRESS_PROPERTIES = [('best_cost', 'REAL'), ('iterations', 'INTEGER')]
+
+STATUS_VALUES = ['Unknown status', 'Invalid start', 'Invalid goal', 'Unrecognized goal type',
+                 'Timeout', 'Approximate solution', 'Exact solution', 'Crash', 'Abort', 'Infeasible']
+EXACT_SOLUTION = STATUS_VALUES.index('Exact solution')
+TIMEOUT = STATUS_VALUES.index('Timeout')
+
+# Rows per executemany batch
+BATCH_ROWS = 10_000
+
+
+def planner_names(n_planners):
+    return PLANNERS[:n_planners] + [f'geometric_Planner{k}' for k in range(len(PLANNERS), n_planners)]
+
+
+def _run_rows(rng, n, time_limit, quality):
+    # Columns of n runs of one planner, as Python values in RUN_PROPERTIES order
+    solved = rng.random(n) < 0.95
+    approximate = ~solved & (rng.random(n) < 0.5)
+    length = rng.normal(1800.0, 60.0, n) * quality
+    best_cost = np.where(solved | approximate, length * rng.uniform(1.0, 1.1, n), np.nan)
+    states = rng.integers(1_000, 50_000, n)
+    iterations = (states * rng.uniform(2.0, 5.0, n)).astype(np.int64)
+    segments = rng.integers(10, 40, n)
+    columns = [
+        approximate.astype(int), best_cost, solved.astype(int), solved.astype(int),
+        (states * rng.uniform(5.0, 15.0, n)).astype(np.int64), states, iterations,
+        states * 0.004 + rng.uniform(1.0, 10.0, n), rng.exponential(0.05, n),
+        solved.astype(int), solved.astype(int),
+        rng.uniform(0.5, 10.0, n), length * 0.95, segments // 2, rng.uniform(0.0, 1.0, n),
+        rng.uniform(0.1, 5.0, n), rng.uniform(0.0, 1.0, n), length, segments, rng.uniform(0.0, 1.0, n),
+        solved.astype(int), np.where(solved, EXACT_SOLUTION, TIMEOUT),
+        np.full(n, time_limit), rng.uniform(0.9, 1.0, n),
+    ]
+    rows = np.empty((n, len(columns)), dtype=object)
+    for k, column in enumerate(columns):
+        rows[:, k] = column.tolist()
+    rows[np.isnan(best_cost), 1] = None
+    return rows, best_cost
+
+
+def _progress_rows(rng, run_ids, best_costs, time_limit, points):
+    # Anytime curves: no solution at first, then a non-increasing best cost
+    n = len(run_ids)
+    step = time_limit / points
+    times = np.arange(1, points + 1) * step + rng.uniform(-0.1, 0.1, (n, points)) * step
+    times = np.round(np.clip(times, 0.0, time_limit), 6)
+    first = rng.integers(0, max(1, points // 10), n)
+    final = np.nan_to_num(best_costs)
+    drops = rng.exponential(1.0, (n, points)) * (rng.random((n, points)) < 0.3)
+    remaining = np.cumsum(drops[:, ::-1], axis=1)[:, ::-1]
+    costs = final[:, np.newaxis] * (1.0 + 0.4 * remaining / (remaining[:, :1] + 1e-9))
+    costs[np.arange(points)[np.newaxis, :] < first[:, np.newaxis]] = np.nan
+    # Runs without any solution never report a cost
+    costs[np.isnan(best_costs)] = np.nan
+    iterations = np.cumsum(rng.integers(50, 500, (n, points)), axis=1)
+
+    rows = np.empty((n * points, 4), dtype=object)
+    rows[:, 0] = np.repeat(run_ids, points).tolist()
+    rows[:, 1] = times.ravel().tolist()
+    rows[:, 2] = costs.ravel().tolist()
+    rows[:, 3] = iterations.ravel().tolist()
+    rows[np.isnan(costs.ravel()), 2] = None
+    return rows
+
+
+def generate_database(db_path, planners=3, runs=100, progress_points=100, experiments=1,
+                      sampler_id=0, time_limit=60.0, seed=0):
+    """Write an OMPL benchmark database with synthetic results.
+
+    The tables and columns are the ones ompl_benchmark_statistics.py creates
+    for SE3RigidBodyPlanningBenchmark logs (experiments with a sampler_id
+    parameter, plannerConfigs, enums, runs, progress). Each experiment has
+    runs runs per planner and every run has progress_points progress rows.
+    The same seed always gives the same database.
+    """
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    rng = np.random.default_rng(seed)
+    names = planner_names(planners)
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+        conn.execute(f'PRAGMA cache_size = -{CACHE_SIZE_KIB}')
+        conn.executescript(SCHEMA.replace('seed INTEGER, setup TEXT)', 'seed INTEGER, setup TEXT, sampler_id INTEGER)'))
+        conn.execute('BEGIN')
+        for name, sql_type in RUN_PROPERTIES:
+            conn.execute(f'ALTER TABLE runs ADD {name} {sql_type}')
+        for name, sql_type in PROGRESS_PROPERTIES:
+            conn.execute(f'ALTER TABLE progress ADD {name} {sql_type}')
+        conn.executemany('INSERT INTO enums VALUES (?, ?, ?)',
+                         [('status', k, value) for k, value in enumerate(STATUS_VALUES)])
+        conn.executemany('INSERT INTO plannerConfigs (id, name, settings) VALUES (?, ?, ?)',
+                         [(k + 1, name, SETTINGS) for k, name in enumerate(names)])
+
+        run_sql = f'INSERT INTO runs VALUES ({", ".join("?" * (len(RUN_PROPERTIES) + 3))})'
+        next_run = 1
+        for experiment in range(1, experiments + 1):
+            conn.execute('INSERT INTO experiments VALUES (?, ?, ?, ?, 10000.0, ?, ?, ?, ?, ?, ?, ?, ?)',
+                         (experiment, 'cubicles', time_limit * runs * planners, time_limit, runs,
+                          'OMPL 1.6.0', 'synthetic', 'synthetic CPU', '2024-07-19T15:22:05',
+                          int(seed) + experiment, 'synthetic setup', sampler_id))
+            for planner in range(planners):
+                quality = 1.0 + 0.05 * planner
+                # Batched by runs so memory stays flat however many runs there are
+                batch = max(1, BATCH_ROWS // max(1, progress_points))
+                for start in range(0, runs, batch):
+                    n = min(batch, runs - start)
+                    run_ids = np.arange(next_run, next_run + n)
+                    rows, best_costs = _run_rows(rng, n, time_limit, quality)
+                    ids = np.empty((n, 3), dtype=object)
+                    ids[:, 0] = run_ids.tolist()
+                    ids[:, 1] = experiment
+                    ids[:, 2] = planner + 1
+                    conn.executemany(run_sql, np.hstack([ids, rows]).tolist())
+                    if progress_points:
+                        conn.executemany('INSERT INTO progress VALUES (?, ?, ?, ?)',
+                                         _progress_rows(rng, run_ids, best_costs, time_limit,
+                                                        progress_points).tolist())
+                    next_run += n
+        conn.execute('COMMIT')
+    finally:
+        conn.close()
+    return db_path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a synthetic OMPL benchmark database.')
+    parser.add_argument('database')
+    parser.add_argument('--planners', type=int, default=3)
+    parser.add_argument('--runs', type=int, default=100, help='runs per planner and experiment')
+    parser.add_argument('--progress-points', type=int, default=100, help='progress rows per run')
+    parser.add_argument('--experiments', type=int, default=1)
+    parser.add_argument('--sampler-id', type=int, default=0)
+    parser.add_argument('--time-limit', type=float, default=60.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    generate_database(args.database, args.planners, args.runs, args.progress_points, args.experiments,
+                      args.sampler_id, args.time_limit, args.seed)
+    print(f'Synthetic database written to {args.database}')
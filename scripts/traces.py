@@ -0,0 +1,159 @@
+import numpy as np
+
+from instrument import traced
+
+# Above this many points in a figure Plotly switches to WebGL traces
+WEBGL_THRESHOLD = 20_000
+
+# Default cap on the number of points drawn for one run
+MAX_POINTS_PER_RUN = 500
+
+
+def drop_redundant_steps(progress_df, value='best_cost'):
+    """Keep only the rows where a run's value changes (plus each run's first and last row).
+
+    The best cost is a step function, so repeated values between improvements
+    carry no information for plotting. Rows without a value (no solution yet)
+    are dropped as well.
+    """
+    df = progress_df.dropna(subset=[value]).sort_values(['runid', 'time'], kind='stable')
+    runs = df['runid'].to_numpy()
+    values = df[value].to_numpy()
+
+    first = np.ones(len(df), dtype=bool)
+    first[1:] = runs[1:] != runs[:-1]
+    last = np.ones(len(df), dtype=bool)
+    last[:-1] = runs[:-1] != runs[1:]
+    changed = np.ones(len(df), dtype=bool)
+    changed[1:] = values[1:] != values[:-1]
+    return df[first | last | changed]
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets downsampling; returns the indices to keep."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third vertex
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[stop:next_stop].mean() if next_stop > stop else x[-1]
+        avg_y = y[stop:next_stop].mean() if next_stop > stop else y[-1]
+        area = np.abs((x[prev] - avg_x) * (y[start:stop] - y[prev])
+                      - (x[prev] - x[start:stop]) * (avg_y - y[prev]))
+        prev = start + int(np.argmax(area))
+        keep[i + 1] = prev
+    return keep
+
+
+def minmax_decimate(x, y, n_out):
+    """Min/max decimation to at most n_out points using equal-count buckets.
+
+    Every bucket keeps its lowest and highest value, so the drawn envelope
+    of the trace is exact; only points strictly inside it are dropped.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+
+    starts = np.linspace(0, n, (n_out - 2) // 2, endpoint=False).astype(np.int64)
+    bucket = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, n)))
+    order = np.lexsort((y, bucket))
+    ends = np.append(starts[1:], n) - 1
+    keep = np.concatenate([[0, n - 1], order[starts], order[ends]])
+    return np.unique(keep)
+
+
+DECIMATORS = {'lttb': lttb, 'minmax': minmax_decimate}
+
+
+@traced()
+def run_traces(progress_df, value='best_cost', max_points=MAX_POINTS_PER_RUN, method='minmax'):
+    """Yield (planner name, runid, time, value) arrays, one reduced trace per run."""
+    decimate = DECIMATORS[method]
+    df = drop_redundant_steps(progress_df, value)
+    runs = df['runid'].to_numpy()
+    times = df['time'].to_numpy(dtype='float64')
+    values = df[value].to_numpy(dtype='float64')
+    names = df['name'].to_numpy()
+    if len(df) == 0:
+        return
+
+    bounds = np.flatnonzero(np.diff(runs)) + 1
+    for start, stop in zip(np.r_[0, bounds], np.r_[bounds, len(df)]):
+        x, y = times[start:stop], values[start:stop]
+        keep = decimate(x, y, max_points)
+        yield names[start], runs[start], x[keep], y[keep]
+
+
+def planner_traces(progress_df, key='plannerid', max_points=MAX_POINTS_PER_RUN, method='minmax'):
+    """Reduced per-run traces split once into {planner key: [traces]}.
+
+    Runs are assigned to planners through the key column (runs.plannerid),
+    so any number of planner pairs can be drawn later without rescanning.
+    """
+    planner_of_run = progress_df.drop_duplicates('runid').set_index('runid')[key]
+    partitions = {}
+    for trace in run_traces(progress_df, max_points=max_points, method=method):
+        partitions.setdefault(planner_of_run[trace[1]], []).append(trace)
+    return partitions
+
+
+def best_cost_figure(progress_df, title, max_points=MAX_POINTS_PER_RUN, method='minmax',
+                     webgl_threshold=WEBGL_THRESHOLD):
+    """Plotly figure with one step trace per run, coloured and grouped by planner."""
+    traces = list(run_traces(progress_df, max_points=max_points, method=method))
+    return traces_figure(traces, title, webgl_threshold)
+
+
+def traces_figure(traces, title, webgl_threshold=WEBGL_THRESHOLD):
+    """Plotly figure from (name, runid, time, value) traces, as built by run_traces."""
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    total_points = sum(len(x) for _, _, x, _ in traces)
+    scatter = go.Scattergl if total_points > webgl_threshold else go.Scatter
+
+    planners = list(dict.fromkeys(name for name, _, _, _ in traces))
+    colors = px.colors.qualitative.Plotly
+    color_map = {name: colors[i % len(colors)] for i, name in enumerate(planners)}
+
+    fig = go.Figure()
+    shown = set()
+    for name, runid, x, y in traces:
+        fig.add_trace(scatter(
+            x=x, y=y, mode='lines', name=name, legendgroup=name,
+            showlegend=name not in shown, line=dict(color=color_map[name], shape='hv', width=1),
+            opacity=0.6, hovertemplate=f'{name} run {runid}<br>time=%{{x}}<br>best cost=%{{y}}<extra></extra>',
+        ))
+        shown.add(name)
+    fig.update_layout(title=title, xaxis_title='Time', yaxis_title='Best Cost', legend_title='name')
+    return fig
+
+
+@traced()
+def plot_best_cost_runs(ax, progress_df, palette=None, max_points=MAX_POINTS_PER_RUN, method='minmax'):
+    """Draw one step line per run on a matplotlib axis (one LineCollection per planner)."""
+    import matplotlib
+    from matplotlib.collections import LineCollection
+
+    segments = {}
+    for name, _, x, y in run_traces(progress_df, max_points=max_points, method=method):
+        # Expand the points into the corners of a post-step line
+        step_x = np.repeat(x, 2)[1:]
+        step_y = np.repeat(y, 2)[:-1]
+        segments.setdefault(name, []).append(np.column_stack([step_x, step_y]))
+
+    palette = palette or {}
+    cycle = matplotlib.rcParams['axes.prop_cycle'].by_key()['color']
+    for i, (name, lines) in enumerate(segments.items()):
+        color = palette.get(name, cycle[i % len(cycle)])
+        ax.add_collection(LineCollection(lines, colors=color, linewidths=1, alpha=0.5, label=name))
+    ax.autoscale_view()
+    return ax